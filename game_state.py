@@ -65,7 +65,7 @@ def smoothstep_f10(x_f10:int) -> int:
 def score_before_continue():
     score = 0
     for i_level in range(utils.save_data.i_level):
-        score += utils.save_data.arr_level_strokes[i_level] - \
+        score += utils.save_data.get_level_strokes(i_level) - \
             levels.levels[i_level].par
     return score
 
@@ -766,8 +766,8 @@ class FrameHandlerRoll:
             if mgs.ball.in_hole:
                 # Save outcome for continuous play
                 if mgs.continuous_play:
-                    utils.save_data.arr_level_strokes[mgs.i_level] = \
-                        min(255, mgs.num_strokes + 1)
+                    utils.save_data.set_level_strokes(
+                        mgs.i_level, min(255, mgs.num_strokes + 1))
                     utils.save_data.i_level = \
                         (mgs.i_level + 1) % len(levels.levels)
                     utils.save_data.save()
@@ -903,7 +903,7 @@ class FrameHandlerScoreCard:
         for i_level in range(num_levels):
             level = i_level + 1
             par = levels.levels[i_level].par
-            strokes = utils.save_data.arr_level_strokes[i_level]
+            strokes = utils.save_data.get_level_strokes(i_level)
             score = strokes - par
             self.str_level += encode_scorecard_num(level)
             self.str_par += encode_scorecard_num(par)
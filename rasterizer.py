@@ -324,11 +324,11 @@ PB_MAX_PIXELS = const(1024)
 class PayloadBuffer:
     def __init__(self):
         # Row-major; first element is top-left (like display buffer, but now a
-        # full int16 per pixel)
-        # TODO: see if this tolerates non-zeroed contents
-        self.buffer = array('h', range(PB_MAX_PIXELS))
-        for i in range(len(self.buffer)):
-            self.buffer[i] = 0
+        # full byte per pixel)
+        self.buffer = bytearray(PB_MAX_PIXELS)
+        # Sparse second plane for the high byte of the payload; a pixel's entry
+        # is only written (and only meaningful) where that byte is nonzero
+        self.buffer_high = bytearray(PB_MAX_PIXELS)
         self.width = 1
         self.height = 1
 
@@ -340,10 +340,10 @@ class PayloadBuffer:
         self.width = width
         self.height = height
 
-    # Fills the current-dimensions buffer with payload
+    # Fills the current-dimensions buffer with payload (low byte only)
     @micropython.viper
     def fill(self, payload:int):
-        buf = ptr16(self.buffer)
+        buf = ptr8(self.buffer)
         size = int(self.width) * int(self.height)
         for i in range(size):
             buf[i] = payload
@@ -627,16 +627,27 @@ class ScanlineRasterizer:
                     for i_reg in range(int(RL_NUM_REGIONS)):
                         if arr_region_insideness[i_reg] > 0:
                             if buffer_is_payload:
-                                # Write region's payload to span of payload buf
+                                # Write region's payload to span of payload
+                                # buf: low byte to buf0, high byte (if any) to
+                                # buf1
                                 x = s - s_first
                                 y_begin = p_span_begin - p_first
                                 i_pay = x + y_begin * x_dim
                                 i_pay_end = i_pay + (p - p_span_begin) * x_dim
-                                buf_payload = ptr16(buf0)
+                                buf_payload = ptr8(buf0)
                                 payload = arr_region_payload[i_reg]
-                                while i_pay < i_pay_end:
-                                    buf_payload[i_pay] = payload
-                                    i_pay += x_dim
+                                payload_low = payload & 0xff
+                                payload_high = payload >> 8
+                                if payload_high:
+                                    buf_payload_high = ptr8(buf1)
+                                    while i_pay < i_pay_end:
+                                        buf_payload[i_pay] = payload_low
+                                        buf_payload_high[i_pay] = payload_high
+                                        i_pay += x_dim
+                                else:
+                                    while i_pay < i_pay_end:
+                                        buf_payload[i_pay] = payload_low
+                                        i_pay += x_dim
                             else:
                                 x = s - s_first
                                 fill_mask0 = \
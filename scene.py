@@ -23,9 +23,21 @@ from rasterizer import *
 
 # Misc math helpers
 
-@micropython.native
-def sqrt_int(x):
-    return int(math.sqrt(x))
+# Returns floor(sqrt(x)) for x >= 0, digit by digit without floats
+@micropython.viper
+def sqrt_int(x:int) -> int:
+    root = 0
+    bit = 1 << 30
+    while bit > x:
+        bit >>= 2
+    while bit:
+        if x >= root + bit:
+            x -= root + bit
+            root = (root >> 1) + bit
+        else:
+            root >>= 1
+        bit >>= 2
+    return root
 
 # Helpers to deal with angles expressed as an integer number of degrees wrapped
 # to [0, 360) -- "wrapped degrees" or "wd". Interpreted as an angle from +x in
@@ -48,42 +60,122 @@ def sin_wd_f10(wd):
 def cos_wd_f10(wd):
     return int(math.cos(wd * COEFF_DEGREES_TO_RADIANS) * 1024)
 
+# Lookup table of atan(k / 64) in 8.8 fixed-point degrees, for k in [0, 64]
+ATAN_TABLE_DEGREES_F8 = array('h', (
+    int(math.atan(k / 64) * COEFF_RADIANS_TO_DEGREES * 256 + 0.5)
+    for k in range(65)))
+
+# Returns atan2(y, x) in 8.8 fixed-point degrees in [-180, 180], using integer
+# math: fold into the first octant, interpolate the lookup table, then unfold
+@micropython.viper
+def atan2_degrees_f8(y:int, x:int) -> int:
+    x_abs = x if x >= 0 else 0 - x
+    y_abs = y if y >= 0 else 0 - y
+    if x_abs >= y_abs:
+        lo = y_abs
+        hi = x_abs
+    else:
+        lo = x_abs
+        hi = y_abs
+    if hi == 0:
+        return 0
+    # Ratio in [0, 1] as f16 -> table index and f10 fraction
+    ratio_f16 = (lo << 16) // hi
+    i_table = ratio_f16 >> 10
+    frac_f10 = ratio_f16 & 0x3ff
+    table = ptr16(ATAN_TABLE_DEGREES_F8)
+    angle_f8 = table[i_table]
+    if frac_f10:
+        angle_f8 += ((table[i_table + 1] - angle_f8) * frac_f10) >> 10
+    if y_abs > x_abs:
+        angle_f8 = (90 << 8) - angle_f8
+    if x < 0:
+        angle_f8 = (180 << 8) - angle_f8
+    if y < 0:
+        angle_f8 = 0 - angle_f8
+    return angle_f8
+
 # Returns the angle of the edge's normal, oriented inwards if the edge is on the
 # CCW-wound perimeter of a polygon
-@micropython.native
-def normal_inward_wd(x_b, y_b, x_e, y_e):
-    return wd_init(
-        int(math.atan2(y_e - y_b, x_e - x_b) * COEFF_RADIANS_TO_DEGREES) - 90)
+@micropython.viper
+def normal_inward_wd(x_b:int, y_b:int, x_e:int, y_e:int) -> int:
+    angle_f8 = int(atan2_degrees_f8(y_e - y_b, x_e - x_b))
+    # Truncate toward zero, as int() of the float angle would
+    if angle_f8 < 0:
+        normal_wd = 0 - ((0 - angle_f8) >> 8) - 90
+    else:
+        normal_wd = (angle_f8 >> 8) - 90
+    if normal_wd < 0:
+        normal_wd += 360
+    return normal_wd
 
 # Returns true if an object with velocity at the specified angle would hit the
 # edge side that a normal of angle normal_wd extends outward from
 @micropython.viper
 def velocity_hits_normal_wd(v_angle_wd:int, normal_wd:int) -> bool:
+    # Wrap difference to [0, 360) w/o branching, then test (90, 270) with one
+    # unsigned compare
     diff = v_angle_wd - normal_wd
-    if diff < 0:
-        diff = 0 - diff
-    return diff > 90 and diff < 270
+    diff += 360 & (diff >> 31)
+    return uint(diff - 91) < uint(179)
+
+# Same test as velocity_hits_normal_wd() for the edge at chunk index i_chunk,
+# fetching its normal from arr_chunk_normal_wd. Returns 1 or 0. Thumb-1 only
+# (the RP2040 is ARMv6-M), and branchless: the unsigned range test is read from
+# the carry flag.
+@micropython.asm_thumb
+def velocity_hits_edge_wd(r0, r1, r2):
+    # r3 = arr_chunk_normal_wd[i_chunk]
+    add(r2, r2, r2)
+    add(r1, r1, r2)
+    ldrh(r3, [r1, 0])
+    # r3 = v_angle_wd - normal_wd, wrapped to [0, 360)
+    sub(r3, r0, r3)
+    asr(r2, r3, 31)
+    mov(r1, 180)
+    add(r1, r1, r1)
+    and_(r2, r1)
+    add(r3, r3, r2)
+    # r0 = 1 if uint(diff - 91) < 179 else 0
+    sub(r3, 91)
+    cmp(r3, 179)
+    sbc(r0, r0)
+    neg(r0, r0)
 
 # Returns the angle of the velocity of an object after reflecting off a surface
 # with the indicated normal, assuming velocity_hits_normal_wd()
 @micropython.viper
 def reflect_velocity_about_normal_wd(v_angle_wd:int, normal_wd:int) -> int:
-    # Just use mod, whatever
-    return ((normal_wd << 1) - v_angle_wd - 180) % 360
+    # Result before wrapping is in [-539, 538], so wrap w/o dividing
+    reflect_wd = (normal_wd << 1) - v_angle_wd - 180
+    if reflect_wd < 0:
+        reflect_wd += 360
+        if reflect_wd < 0:
+            reflect_wd += 360
+    elif reflect_wd >= 360:
+        reflect_wd -= 360
+    return reflect_wd
+
+# Angle to add to normal0 to get the half vector between normal0 and normal1,
+# indexed by the wd to add to normal0 to get normal1
+BISECTOR_HALF_WD = array('h', ((d >> 1) if d < 180 else (d >> 1) + 180
+                              for d in range(360)))
 
 # Returns the effective normal to use for reflecting velocity at the endpoint
 # between the edges with the two specified normals, if the object touches both
 # edges and velocity_hits_normal_wd() for both normals
 @micropython.viper
 def get_endpoint_normal_wd(normal0_wd:int, normal1_wd:int) -> int:
-    # Just use mod again
     # Find wd to add to normal0's angle to get normal1
-    zero_to_one_wd = (normal1_wd - normal0_wd) % 360
+    zero_to_one_wd = normal1_wd - normal0_wd
+    if zero_to_one_wd < 0:
+        zero_to_one_wd += 360
     # Return angle of half vector for shorter arc between 0 and 1
-    if zero_to_one_wd < 180:
-        return (normal0_wd + (zero_to_one_wd >> 1)) % 360
-    else:
-        return (normal0_wd + (zero_to_one_wd >> 1) + 180) % 360
+    bisector_half_wd = ptr16(BISECTOR_HALF_WD)
+    endpoint_wd = normal0_wd + bisector_half_wd[zero_to_one_wd]
+    if endpoint_wd >= 360:
+        endpoint_wd -= 360
+    return endpoint_wd
 
 # Serializable representation of scene geometry
 
@@ -112,6 +204,14 @@ class ChunkData:
         for i in range(len(self.arr_chunk_data)):
             self.arr_chunk_data[i] = 0
         self.num_chunks = 0
+        # Same data split per field, indexed by chunk: arr_chunk_field<n> holds
+        # the field with I_CHUNK_* index n
+        self.arr_chunk_field0 = array('h', range(MAX_NUM_CHUNKS))
+        self.arr_chunk_field1 = array('h', range(MAX_NUM_CHUNKS))
+        self.arr_chunk_field2 = array('h', range(MAX_NUM_CHUNKS))
+        self.arr_chunk_field3 = array('h', range(MAX_NUM_CHUNKS))
+        # Derived bitmap of which chunks are loops, one bit per chunk
+        self.bytes_chunk_is_loop = bytearray((MAX_NUM_CHUNKS >> 3) + 1)
         # Derived edge normal data for collision detection / response
         self.arr_chunk_normal_wd = array('h', range(MAX_NUM_CHUNKS))
         # AABB
@@ -119,68 +219,132 @@ class ChunkData:
         self.yw_lo = 0
         self.xw_hi = 0
         self.yw_hi = 0
+        # AABB as computed by Viper code: xw_lo, yw_lo, xw_hi, yw_hi
+        self.arr_aabb = array('l', (0, 0, 0, 0))
 
     @micropython.native
     def _update_derived(self):
         # Update edge normals, AABB
+        self._update_normals_and_aabb()
+        arr_aabb = self.arr_aabb
+        self.xw_lo = arr_aabb[0]
+        self.yw_lo = arr_aabb[1]
+        self.xw_hi = arr_aabb[2]
+        self.yw_hi = arr_aabb[3]
+
+    # Single pass over the chunk data to find each edge's normal and the AABB
+    # of the begin vertices
+    @micropython.viper
+    def _update_normals_and_aabb(self):
+        arr_chunk_loop = ptr16(self.arr_chunk_field0)
+        arr_chunk_x_b = ptr16(self.arr_chunk_field1)
+        arr_chunk_y_b = ptr16(self.arr_chunk_field2)
+        arr_chunk_normal_wd = ptr16(self.arr_chunk_normal_wd)
         xw_lo = 1 << 20
         yw_lo = 1 << 20
-        xw_hi = -xw_lo
-        yw_hi = -yw_lo
-        for i_chunk in range(self.num_chunks):
-            if self.chunk_is_loop(i_chunk):
+        xw_hi = 0 - xw_lo
+        yw_hi = 0 - yw_lo
+        i_chunk_first = 0
+        num_chunks = int(self.num_chunks)
+        i_chunk = 0
+        while i_chunk < num_chunks:
+            if arr_chunk_loop[i_chunk]:
+                # First edge of the loop, to close the loop's last edge
+                i_chunk_first = i_chunk + 1
+                i_chunk += 1
                 continue
-            xw_b, yw_b, xw_e, yw_e = \
-                self.chunk_edge_get_endpoints(i_chunk)
-            xw_lo = min(xw_lo, xw_b)
-            xw_hi = max(xw_hi, xw_b)
-            yw_lo = min(yw_lo, yw_b)
-            yw_hi = max(yw_hi, yw_b)
-            self.arr_chunk_normal_wd[i_chunk] = \
-                normal_inward_wd(xw_b, yw_b, xw_e, yw_e)
-        self.xw_lo = xw_lo
-        self.yw_lo = yw_lo
-        self.xw_hi = xw_hi
-        self.yw_hi = yw_hi
+            xw_b = (arr_chunk_x_b[i_chunk] << 16) >> 16
+            yw_b = (arr_chunk_y_b[i_chunk] << 16) >> 16
+            if xw_b < xw_lo:
+                xw_lo = xw_b
+            if xw_b > xw_hi:
+                xw_hi = xw_b
+            if yw_b < yw_lo:
+                yw_lo = yw_b
+            if yw_b > yw_hi:
+                yw_hi = yw_b
+            # End vertex is the next edge's, looping back if needed
+            i_chunk_e = i_chunk + 1
+            if arr_chunk_loop[i_chunk_e]:
+                i_chunk_e = i_chunk_first
+            xw_e = (arr_chunk_x_b[i_chunk_e] << 16) >> 16
+            yw_e = (arr_chunk_y_b[i_chunk_e] << 16) >> 16
+            arr_chunk_normal_wd[i_chunk] = \
+                int(normal_inward_wd(xw_b, yw_b, xw_e, yw_e))
+            i_chunk += 1
+        arr_aabb = ptr32(self.arr_aabb)
+        arr_aabb[0] = xw_lo
+        arr_aabb[1] = yw_lo
+        arr_aabb[2] = xw_hi
+        arr_aabb[3] = yw_hi
 
     def load_level(self, level, file_name):
         with open(file_name, "rb") as f:
             f.seek(level.offset_bytes)
             f.readinto(self.arr_chunk_data)
             self.num_chunks = level.num_chunks
+        self._update_chunk_fields()
+        self._update_chunk_is_loop()
         self._update_derived()
 
-    @micropython.native
-    def chunk_is_loop(self, i_chunk):
-        if i_chunk >= self.num_chunks:
-            raise RuntimeError("chunk index out of range")
-        return bool(self.arr_chunk_data[(i_chunk << 2) + \
-                        I_CHUNK_IF_LOOP_MASK_TRIGGER_LAYER])
+    # De-interleaves the loaded chunk data into the per-field arrays
+    @micropython.viper
+    def _update_chunk_fields(self):
+        arr_chunk_data = ptr16(self.arr_chunk_data)
+        arr_chunk_field0 = ptr16(self.arr_chunk_field0)
+        arr_chunk_field1 = ptr16(self.arr_chunk_field1)
+        arr_chunk_field2 = ptr16(self.arr_chunk_field2)
+        arr_chunk_field3 = ptr16(self.arr_chunk_field3)
+        num_chunks = int(self.num_chunks)
+        i_chunk = 0
+        i_acd = 0
+        while i_chunk < num_chunks:
+            arr_chunk_field0[i_chunk] = arr_chunk_data[i_acd]
+            arr_chunk_field1[i_chunk] = arr_chunk_data[i_acd + 1]
+            arr_chunk_field2[i_chunk] = arr_chunk_data[i_acd + 2]
+            arr_chunk_field3[i_chunk] = arr_chunk_data[i_acd + 3]
+            i_chunk += 1
+            i_acd += int(I_CHUNK_NUM_FIELDS)
 
-    @micropython.native
-    def chunk_edge_get_endpoints(self, i_chunk):
-        # Confirm i_chunk is in-range and an edge
-        if i_chunk >= self.num_chunks:
+    @micropython.viper
+    def _update_chunk_is_loop(self):
+        bytes_chunk_is_loop = ptr8(self.bytes_chunk_is_loop)
+        arr_chunk_loop = ptr16(self.arr_chunk_field0)
+        num_chunks = int(self.num_chunks)
+        for i in range((int(MAX_NUM_CHUNKS) >> 3) + 1):
+            bytes_chunk_is_loop[i] = 0
+        i_chunk = 0
+        while i_chunk < num_chunks:
+            if arr_chunk_loop[i_chunk]:
+                bytes_chunk_is_loop[i_chunk >> 3] |= 1 << (i_chunk & 7)
+            i_chunk += 1
+
+    @micropython.viper
+    def chunk_is_loop(self, i_chunk:int):
+        if i_chunk >= int(self.num_chunks):
             raise RuntimeError("chunk index out of range")
-        arr_chunk_data = self.arr_chunk_data
-        i_acd_chunk = i_chunk << 2
-        if bool(arr_chunk_data[i_acd_chunk + \
-                    I_CHUNK_IF_LOOP_MASK_TRIGGER_LAYER]):
-            raise RuntimeError("chunk is not an edge")
+        bytes_chunk_is_loop = ptr8(self.bytes_chunk_is_loop)
+        return ((bytes_chunk_is_loop[i_chunk >> 3] >> (i_chunk & 7)) & 1) != 0
+
+    # Writes the edge chunk's begin and end vertices to out as x_b, y_b, x_e,
+    # y_e. Caller must ensure i_chunk is an in-range edge chunk.
+    @micropython.viper
+    def chunk_edge_get_endpoints_into(self, i_chunk:int, out:ptr16):
+        arr_chunk_loop = ptr16(self.arr_chunk_field0)
+        arr_chunk_x_b = ptr16(self.arr_chunk_field1)
+        arr_chunk_y_b = ptr16(self.arr_chunk_field2)
         # Fetch begin vertex
-        x_b = (arr_chunk_data[i_acd_chunk + I_CHUNK_EDGE_X_B] << 16) >> 16
-        y_b = (arr_chunk_data[i_acd_chunk + I_CHUNK_EDGE_Y_B] << 16) >> 16
-        # Find endpoint's edge chunk, looping back if needed
-        i_acd_chunk += I_CHUNK_NUM_FIELDS
-        if bool(arr_chunk_data[i_acd_chunk + \
-                    I_CHUNK_IF_LOOP_MASK_TRIGGER_LAYER]):
-            i_chunk_edge = \
-                arr_chunk_data[i_acd_chunk + I_CHUNK_LOOP_LAST_LOOP] + 1
-            i_acd_chunk = i_chunk_edge << 2
+        out[0] = arr_chunk_x_b[i_chunk]
+        out[1] = arr_chunk_y_b[i_chunk]
+        # Find endpoint's edge chunk, looping back via the next loop's link to
+        # this loop if needed
+        i_chunk_e = i_chunk + 1
+        if arr_chunk_loop[i_chunk_e]:
+            arr_chunk_last_loop = ptr16(self.arr_chunk_field3)
+            i_chunk_e = arr_chunk_last_loop[i_chunk_e] + 1
         # Fetch end vertex
-        x_e = (arr_chunk_data[i_acd_chunk + I_CHUNK_EDGE_X_B] << 16) >> 16
-        y_e = (arr_chunk_data[i_acd_chunk + I_CHUNK_EDGE_Y_B] << 16) >> 16
-        return x_b, y_b, x_e, y_e
+        out[2] = arr_chunk_x_b[i_chunk_e]
+        out[3] = arr_chunk_y_b[i_chunk_e]
 
 # Transforming and rasterizing ChunkData
 
@@ -196,13 +360,40 @@ MGS_REGION_FAIRWAY = const(7)
 # TODO CRITICAL: keep synced with RL_REGION_UNUSED in rasterizer
 MGS_REGION_EMPTY = const(8)
 
-# Bit to OR with non-wall region numbers to form the payload values for those
-# regions. For wall edges, will use the edges' chunk indices as the payload.
-MGS_PAYLOAD_BIT_NON_WALL = const(1 << 11)
-MGS_PAYLOAD_MASK_LOW = const(MGS_PAYLOAD_BIT_NON_WALL - 1)
-# Shift to apply to trigger mask to OR it with region payload, for regions that
-# are layer-mask reset triggers
-MGS_PAYLOAD_SHIFT_MASK_TRIGGER = const(12)
+# Bits to OR with non-wall region numbers to form the (low byte) payload values
+# for those regions. For wall edges, will use the edges' chunk indices as the
+# payload; those are below MAX_NUM_CHUNKS, so never have both bits set.
+MGS_PAYLOAD_BITS_NON_WALL = const(0xc0)
+MGS_PAYLOAD_MASK_REGION = const(0xf)
+# Bit set in the low byte of payloads for regions that are layer-mask reset
+# triggers, and shift to apply to the trigger mask to place it in the high byte
+MGS_PAYLOAD_BIT_TRIGGER = const(1 << 5)
+MGS_PAYLOAD_SHIFT_MASK_TRIGGER = const(8)
+
+# Per-region contact flags for ball physics, indexed by MGS_REGION_* (regions
+# fit in MGS_PAYLOAD_MASK_REGION). Slope bits give the sign of the slope's
+# push along y (+/-) and x (+/-).
+MGS_FLAG_GRASS = const(1 << 0)
+MGS_FLAG_SAND = const(1 << 1)
+MGS_FLAG_WATER = const(1 << 2)
+MGS_FLAG_SLOPE_Y_POS = const(1 << 3)
+MGS_FLAG_SLOPE_Y_NEG = const(1 << 4)
+MGS_FLAG_SLOPE_X_POS = const(1 << 5)
+MGS_FLAG_SLOPE_X_NEG = const(1 << 6)
+MGS_FLAGS_SLOPE_Y = const(MGS_FLAG_SLOPE_Y_POS | MGS_FLAG_SLOPE_Y_NEG)
+MGS_FLAGS_SLOPE_X = const(MGS_FLAG_SLOPE_X_POS | MGS_FLAG_SLOPE_X_NEG)
+bytes_mgs_region_flags = bytearray(MGS_PAYLOAD_MASK_REGION + 1)
+bytes_mgs_region_flags[MGS_REGION_SLOPE_RIGHT] = \
+    MGS_FLAG_GRASS | MGS_FLAG_SLOPE_X_POS
+bytes_mgs_region_flags[MGS_REGION_SLOPE_DOWN] = \
+    MGS_FLAG_GRASS | MGS_FLAG_SLOPE_Y_POS
+bytes_mgs_region_flags[MGS_REGION_SLOPE_LEFT] = \
+    MGS_FLAG_GRASS | MGS_FLAG_SLOPE_X_NEG
+bytes_mgs_region_flags[MGS_REGION_SLOPE_UP] = \
+    MGS_FLAG_GRASS | MGS_FLAG_SLOPE_Y_NEG
+bytes_mgs_region_flags[MGS_REGION_SANDTRAP] = MGS_FLAG_SAND
+bytes_mgs_region_flags[MGS_REGION_WATER] = MGS_FLAG_WATER
+bytes_mgs_region_flags[MGS_REGION_FAIRWAY] = MGS_FLAG_GRASS
 
 # Fill patterns for different slope directions -- successive CW in world space
 # starting with +x
@@ -272,27 +463,82 @@ fill_bytes_draw_regions0 = bytearray(len(fill_bytes_src_regions0))
 fill_bytes_draw_regions1 = bytearray(len(fill_bytes_src_regions0))
 
 # Fills ptr_fill_bytes_dst with the fill pattern from ptr_fill_bytes_src shifted
-# by the delta in x and y with wrapping
+# by the delta in x and y with wrapping. Treats the 8 fill bytes as a 64-bit
+# value held in two 32-bit words (fill patterns are 8-byte aligned).
 @micropython.viper
 def copy_fill_bytes_shift(ptr_fill_bytes_src:ptr8, ptr_fill_bytes_dst:ptr8,
                           delta_x:int, delta_y:int):
-    delta_x = delta_x & 0x7
+    src = ptr32(ptr_fill_bytes_src)
+    dst = ptr32(ptr_fill_bytes_dst)
+    # All-zero and all-one patterns are unchanged by any shift
+    src0 = src[0]
+    src1 = src[1]
+    if (src0 | src1) == 0 or (src0 & src1) == -1:
+        dst[0] = src0
+        dst[1] = src1
+        return
+    # x shift: rotate the 64-bit value left by whole bytes
+    if delta_x & 0x4:
+        lo = uint(src[1])
+        hi = uint(src[0])
+    else:
+        lo = uint(src[0])
+        hi = uint(src[1])
+    shift_x = uint((delta_x & 0x3) << 3)
+    if shift_x:
+        shift_x_inv = uint(32) - shift_x
+        lo_new = uint((lo << shift_x) | (hi >> shift_x_inv))
+        hi = uint((hi << shift_x) | (lo >> shift_x_inv))
+        lo = lo_new
+    # y shift: rotate the bits within every byte of a word at once
     delta_y = delta_y & 0x7
-    # Copy src fill to dst, performing x shift
-    for i_src in range(int(8)):
-        ptr_fill_bytes_dst[(i_src + delta_x) & 0x7] = ptr_fill_bytes_src[i_src]
-    # Apply y shift to each fill byte of dst
-    for i_dst in range(int(8)):
-        shifted = ptr_fill_bytes_dst[i_dst] << delta_y
-        ptr_fill_bytes_dst[i_dst] = (shifted | (shifted >> 8)) & 0xff
+    shift_y = uint(delta_y)
+    shift_y_inv = uint(8 - delta_y)
+    mask_hi = uint(((0xff << delta_y) & 0xff) * 0x01010101)
+    mask_lo = uint((0xff >> (8 - delta_y)) * 0x01010101)
+    dst[0] = int(((lo << shift_y) & mask_hi) | ((lo >> shift_y_inv) & mask_lo))
+    dst[1] = int(((hi << shift_y) & mask_hi) | ((hi >> shift_y_inv) & mask_lo))
+
+# Returns a mask with bit i set iff the i-th fill pattern in fill_bytes is all
+# 0xff, which any shift leaves unchanged
+def get_mask_fill_all_ff(fill_bytes):
+    mask = 0
+    for i_fill in range(len(fill_bytes) >> 3):
+        if fill_bytes[i_fill << 3:(i_fill + 1) << 3] == b'\xff' * 8:
+            mask |= 1 << i_fill
+    return mask
+
+mask_fill_all_ff_regions1 = get_mask_fill_all_ff(fill_bytes_src_regions1)
+mask_fill_all_ff_directions1 = \
+    get_mask_fill_all_ff(fill_bytes_src_directions1)
 
 # Overwrites contents of fill_bytes_draw_regions* to appropriate fill patterns
 # given the cumulative x and y deltas relative to the fills in fill_bytes_src_*,
-# the camera angle, and the value of utils.use_gray
+# the camera angle, and the value of utils.use_gray. Only the water fill
+# changes on its own; other fills are redone only when their inputs change.
 list_mgs_region_non_slope = [MGS_REGION_WALL, MGS_REGION_SANDTRAP,
                              MGS_REGION_FAIRWAY]
+# Inputs to the last set_fill_bytes_draw(): delta_x, delta_y, slope direction
+# offset, and use_gray -- initially invalid to force the first update
+arr_fill_bytes_draw_last = array('l', (-1, -1, -1, -1))
 @micropython.viper
 def set_fill_bytes_draw(delta_x:int, delta_y:int, angle_wd:int):
+    delta_x = delta_x & 0x7
+    delta_y = delta_y & 0x7
+    i_off_dir = ((angle_wd + 22) // 45)
+    use_gray = 0
+    if utils.use_gray:
+        use_gray = 1
+    # Compare inputs to last update's
+    last = ptr32(arr_fill_bytes_draw_last)
+    changed_delta = (delta_x ^ last[0]) | (delta_y ^ last[1])
+    changed_dir = changed_delta | (i_off_dir ^ last[2])
+    changed_non_slope = changed_delta | (use_gray ^ last[3])
+    last[0] = delta_x
+    last[1] = delta_y
+    last[2] = i_off_dir
+    last[3] = use_gray
+
     # Get appropriate source and destination arrays
     if utils.use_gray:
         src_regions0 = ptr8(fill_bytes_src_regions0)
@@ -305,16 +551,24 @@ def set_fill_bytes_draw(delta_x:int, delta_y:int, angle_wd:int):
     dst_regions1 = ptr8(fill_bytes_draw_regions1)
     src_water0 = ptr8(fill_bytes_src_water0)
     src_water1 = ptr8(fill_bytes_src_water1)
+    mask_all_ff_regions1 = int(mask_fill_all_ff_regions1)
+    mask_all_ff_directions1 = int(mask_fill_all_ff_directions1)
 
     # Copy non-slope region fills, applying delta
-    for i_region in list_mgs_region_non_slope:
-        off_bytes = int(i_region) << 3
-        src = ptr8(int(src_regions0) + off_bytes)
-        dst = ptr8(int(dst_regions0) + off_bytes)
-        copy_fill_bytes_shift(src, dst, delta_x, delta_y)
-        src = ptr8(int(src_regions1) + off_bytes)
-        dst = ptr8(int(dst_regions1) + off_bytes)
-        copy_fill_bytes_shift(src, dst, delta_x, delta_y)
+    if changed_non_slope:
+        for i_region in list_mgs_region_non_slope:
+            off_bytes = int(i_region) << 3
+            src = ptr8(int(src_regions0) + off_bytes)
+            dst = ptr8(int(dst_regions0) + off_bytes)
+            copy_fill_bytes_shift(src, dst, delta_x, delta_y)
+            if mask_all_ff_regions1 & (1 << int(i_region)):
+                dst32 = ptr32(int(dst_regions1) + off_bytes)
+                dst32[0] = -1
+                dst32[1] = -1
+            else:
+                src = ptr8(int(src_regions1) + off_bytes)
+                dst = ptr8(int(dst_regions1) + off_bytes)
+                copy_fill_bytes_shift(src, dst, delta_x, delta_y)
     # Copy appropriate water frame, applying delta
     i_water = (int(utils.ticks_ms()) >> 8) & 0x3
     off_bytes_water = i_water << 3
@@ -326,16 +580,32 @@ def set_fill_bytes_draw(delta_x:int, delta_y:int, angle_wd:int):
     dst = ptr8(int(dst_regions1) + off_bytes_region)
     copy_fill_bytes_shift(src, dst, delta_x, delta_y)
     # Copy appropriate source direction to each slope region fill, w/ delta
-    i_off_dir = ((angle_wd + 22) // 45)
+    if not changed_dir:
+        return
     for i_dir in range(int(4)):
-        off_bytes_direction = (((i_dir << 1) + i_off_dir) & 0x7) << 3
+        i_direction = ((i_dir << 1) + i_off_dir) & 0x7
+        off_bytes_direction = i_direction << 3
         off_bytes_region = (int(MGS_REGION_SLOPE_RIGHT) + i_dir) << 3
         src = ptr8(int(src_directions0) + off_bytes_direction)
         dst = ptr8(int(dst_regions0) + off_bytes_region)
         copy_fill_bytes_shift(src, dst, delta_x, delta_y)
-        src = ptr8(int(src_directions1) + off_bytes_direction)
-        dst = ptr8(int(dst_regions1) + off_bytes_region)
-        copy_fill_bytes_shift(src, dst, delta_x, delta_y)
+        if mask_all_ff_directions1 & (1 << i_direction):
+            dst32 = ptr32(int(dst_regions1) + off_bytes_region)
+            dst32[0] = -1
+            dst32[1] = -1
+        else:
+            src = ptr8(int(src_directions1) + off_bytes_direction)
+            dst = ptr8(int(dst_regions1) + off_bytes_region)
+            copy_fill_bytes_shift(src, dst, delta_x, delta_y)
+
+# Scratch space for transformed vertices, indexed by edge chunk. Shared by all
+# TransformedRasterizers, as it's only used while setting rasterizer geometry.
+arr_xs_scratch = array('h', range(MAX_NUM_CHUNKS))
+arr_ys_scratch = array('h', range(MAX_NUM_CHUNKS))
+
+# Cache of inverse scales by scale, as only a few scales are commonly used
+INV_SCALE_CACHE_MAX_SIZE = const(16)
+inv_scale_f10_cache = {}
 
 class TransformedRasterizer:
     def __init__(self, chunk_data):
@@ -348,10 +618,18 @@ class TransformedRasterizer:
         # Amount to scale world about (0,0)
         self.scale_f10 = 1 << 10
         self.inv_scale_f10 = 1 << 10
+        # Screen-space ball and hole diameters at that scale, for drawing
+        self.ball_diameter_f10 = BALL_DIAMETER << 10
+        self.hole_diameter_f10 = BALL_HOLE_DIAMETER << 10
         # Amount to rotate world about (0,0)
         self.angle_wd = 0
         self.cos_f10 = 1 << 10
         self.sin_f10 = 0
+        # Combined scale and rotation, and the inverse, updated by setters
+        self.scale_cos_f20 = 1 << 20
+        self.scale_sin_f20 = 0
+        self.inv_scale_cos_f20 = 1 << 20
+        self.inv_scale_sin_f20 = 0
         # After scale and rotation, amount to translate screen-space geometry
         self.translate_screen_x = 0
         self.translate_screen_y = 0
@@ -364,6 +642,15 @@ class TransformedRasterizer:
         self.yw_next_draw_f10 = 0
         self.delta_x_accum = 0
         self.delta_y_accum = 0
+        # Inputs to the last fill pattern update, to skip redundant updates
+        self.last_fill_key = None
+        # Scratch space for edge endpoints
+        self.arr_endpoints = array('h', (0, 0, 0, 0))
+        # Two-slot cache of _world_to_screen_int results before translate, as
+        # the same few points get transformed repeatedly each frame: index of
+        # the most recently used slot, then per slot valid, xw_f10, yw_f10, xs,
+        # ys. Cleared when scale or angle changes.
+        self.arr_w2s_int_cache = array('l', (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0))
 
     @micropython.native
     def set_chunk_data(self, chunk_data):
@@ -372,35 +659,63 @@ class TransformedRasterizer:
 
     @micropython.viper
     def world_to_screen_f10(self, x_world_f10:int, y_world_f10:int):
-        scale_f10 = int(self.scale_f10)
-        cos_f10 = int(self.cos_f10)
-        sin_f10 = int(self.sin_f10)
-
-        # scale -> f10
-        x_f10 = (x_world_f10 * scale_f10 + 0x200) >> 10
-        y_f10 = (y_world_f10 * scale_f10 + 0x200) >> 10
-        # rotate -> f20
-        x_f20 = x_f10 * cos_f10 - y_f10 * sin_f10
-        y_f20 = x_f10 * sin_f10 + y_f10 * cos_f10
+        # Combined scale and rotation as f10, to keep products within 32 bits
+        scale_cos_f10 = (int(self.scale_cos_f20) + 0x200) >> 10
+        scale_sin_f10 = (int(self.scale_sin_f20) + 0x200) >> 10
+
+        # scale and rotate -> f20
+        x_f20 = x_world_f10 * scale_cos_f10 - y_world_f10 * scale_sin_f10
+        y_f20 = x_world_f10 * scale_sin_f10 + y_world_f10 * scale_cos_f10
         # translate -> f10
         return ((x_f20 + 0x200) >> 10) + (int(self.translate_screen_x) << 10), \
                ((y_f20 + 0x200) >> 10) + (int(self.translate_screen_y) << 10)
 
+    # As world_to_screen_f10, but returns screen coordinates rounded to ints
+    # with a single rounding shift. Translate is an int, so it's added after
+    # the (cached) rounding of scale and rotate.
+    @micropython.viper
+    def _world_to_screen_int(self, x_world_f10:int, y_world_f10:int):
+        translate_screen_x = int(self.translate_screen_x)
+        translate_screen_y = int(self.translate_screen_y)
+        cache = ptr32(self.arr_w2s_int_cache)
+        i_slot = 1
+        while i_slot < 11:
+            if cache[i_slot] and cache[i_slot + 1] == x_world_f10 and \
+               cache[i_slot + 2] == y_world_f10:
+                cache[0] = i_slot
+                return cache[i_slot + 3] + translate_screen_x, \
+                       cache[i_slot + 4] + translate_screen_y
+            i_slot += 5
+
+        scale_cos_f10 = (int(self.scale_cos_f20) + 0x200) >> 10
+        scale_sin_f10 = (int(self.scale_sin_f20) + 0x200) >> 10
+        x_f20 = x_world_f10 * scale_cos_f10 - y_world_f10 * scale_sin_f10
+        y_f20 = x_world_f10 * scale_sin_f10 + y_world_f10 * scale_cos_f10
+        xs = (x_f20 + 0x80000) >> 20
+        ys = (y_f20 + 0x80000) >> 20
+        # Replace the less recently used slot
+        i_slot = 6 if cache[0] == 1 else 1
+        cache[0] = i_slot
+        cache[i_slot] = 1
+        cache[i_slot + 1] = x_world_f10
+        cache[i_slot + 2] = y_world_f10
+        cache[i_slot + 3] = xs
+        cache[i_slot + 4] = ys
+        return xs + translate_screen_x, ys + translate_screen_y
+
     @micropython.viper
     def screen_to_world_f10(self, x_screen_f10:int, y_screen_f10:int):
-        inv_scale_f10 = int(self.inv_scale_f10)
-        cos_f10 = int(self.cos_f10)
-        sin_f10 = int(self.sin_f10)
+        # Combined inverse rotation and scale as f10
+        inv_scale_cos_f10 = (int(self.inv_scale_cos_f20) + 0x200) >> 10
+        inv_scale_sin_f10 = (int(self.inv_scale_sin_f20) + 0x200) >> 10
 
         # translate -> f10
         x_f10 = x_screen_f10 - (int(self.translate_screen_x) << 10)
         y_f10 = y_screen_f10 - (int(self.translate_screen_y) << 10)
-        # rotate -> f20
-        x_f20 = y_f10 * sin_f10 + x_f10 * cos_f10
-        y_f20 = y_f10 * cos_f10 - x_f10 * sin_f10
-        # scale -> f10
-        return (((x_f20 + 0x200) >> 10) * inv_scale_f10 + 0x200) >> 10, \
-               (((y_f20 + 0x200) >> 10) * inv_scale_f10 + 0x200) >> 10
+        # rotate and scale -> f20, then back to f10
+        x_f20 = y_f10 * inv_scale_sin_f10 + x_f10 * inv_scale_cos_f10
+        y_f20 = y_f10 * inv_scale_cos_f10 - x_f10 * inv_scale_sin_f10
+        return (x_f20 + 0x200) >> 10, (y_f20 + 0x200) >> 10
 
     @micropython.native
     def get_scale_f10(self):
@@ -408,9 +723,22 @@ class TransformedRasterizer:
 
     @micropython.native
     def set_scale_f10(self, scale_f10):
+        # Settled scale needn't redo rasterizer geometry
+        if scale_f10 == self.scale_f10:
+            return
         self.update_rasterizer_geometry = True
         self.scale_f10 = scale_f10
-        self.inv_scale_f10 = (0x100000 // scale_f10)
+        self.ball_diameter_f10 = scale_f10 * BALL_DIAMETER
+        self.hole_diameter_f10 = scale_f10 * BALL_HOLE_DIAMETER
+        inv_scale_f10 = inv_scale_f10_cache.get(scale_f10)
+        if inv_scale_f10 is None:
+            # Zoom animations pass through many scales -- keep cache small
+            if len(inv_scale_f10_cache) >= INV_SCALE_CACHE_MAX_SIZE:
+                inv_scale_f10_cache.clear()
+            inv_scale_f10 = 0x100000 // scale_f10
+            inv_scale_f10_cache[scale_f10] = inv_scale_f10
+        self.inv_scale_f10 = inv_scale_f10
+        self._update_scale_rotate()
 
     @micropython.native
     def get_angle_wd(self):
@@ -418,10 +746,25 @@ class TransformedRasterizer:
 
     @micropython.native
     def set_angle_wd(self, angle_degrees):
+        # Settled angle needn't redo rasterizer geometry
+        angle_wd = wd_init(angle_degrees)
+        if angle_wd == self.angle_wd:
+            return
         self.update_rasterizer_geometry = True
-        self.angle_wd = wd_init(angle_degrees)
+        self.angle_wd = angle_wd
         self.cos_f10 = cos_wd_f10(self.angle_wd)
         self.sin_f10 = sin_wd_f10(self.angle_wd)
+        self._update_scale_rotate()
+
+    @micropython.native
+    def _update_scale_rotate(self):
+        self.scale_cos_f20 = self.scale_f10 * self.cos_f10
+        self.scale_sin_f20 = self.scale_f10 * self.sin_f10
+        self.inv_scale_cos_f20 = self.inv_scale_f10 * self.cos_f10
+        self.inv_scale_sin_f20 = self.inv_scale_f10 * self.sin_f10
+        arr_w2s_int_cache = self.arr_w2s_int_cache
+        arr_w2s_int_cache[1] = 0
+        arr_w2s_int_cache[6] = 0
 
     @micropython.native
     def set_translate_screen(self, x, y):
@@ -446,9 +789,7 @@ class TransformedRasterizer:
         self.yw_next_draw_f10 = yw_f10
         # Get screen-space coordinates corresponding to (xw, yw) under current
         # translation
-        xs_actual_f10, ys_actual_f10 = self.world_to_screen_f10(xw_f10, yw_f10)
-        xs_actual = (xs_actual_f10 + 0x200) >> 10
-        ys_actual = (ys_actual_f10 + 0x200) >> 10
+        xs_actual, ys_actual = self._world_to_screen_int(xw_f10, yw_f10)
         # Modify translation as needed so (xw, yw) maps to (xs, ys) instead
         xs_desired = (xs_f10 + 0x200) >> 10
         ys_desired = (ys_f10 + 0x200) >> 10
@@ -461,88 +802,72 @@ class TransformedRasterizer:
     def _set_rasterizer_geometry(self):
         rasterizer = self.rasterizer
         rasterizer.clear_edges()
-        arr_chunk_data = ptr16(self.chunk_data.arr_chunk_data)
-        # Will achieve translation w/ rasterizer's window
-        # maybe_translate_screen_x = int(self.translate_screen_x)
-        # maybe_translate_screen_y = int(self.translate_screen_y)
-        maybe_translate_screen_x = int(0)
-        maybe_translate_screen_y = int(0)
-        scale_f10 = int(self.scale_f10)
-        cos_f10 = int(self.cos_f10)
-        sin_f10 = int(self.sin_f10)
-
-        # Transform edges and add to rasterizer
-        # TODO: restructure as single loop over successive chunks, and dedup the
-        # x, y transform logic, using the back-links?
-        i_acd_end = int(I_CHUNK_NUM_FIELDS) * int(self.chunk_data.num_chunks)
-        i_acd_loop = int(0)
-        while i_acd_loop < i_acd_end:
-            # Fetch loop parameters and skip past if empty
-            mask_trigger_layer = arr_chunk_data[i_acd_loop + \
-                int(I_CHUNK_IF_LOOP_MASK_TRIGGER_LAYER)]
-            mask_trigger = mask_trigger_layer >> 8
-            mask_layer = mask_trigger_layer & 0xff
-            region_fill = \
-                arr_chunk_data[i_acd_loop + int(I_CHUNK_LOOP_REGION_FILL)]
-            payload_fill = region_fill | int(MGS_PAYLOAD_BIT_NON_WALL) | \
-                (mask_trigger << int(MGS_PAYLOAD_SHIFT_MASK_TRIGGER))
-            num_edges_loop = \
-                arr_chunk_data[i_acd_loop + int(I_CHUNK_LOOP_NUM_EDGES)]
-            if num_edges_loop == 0:
-                # Skip empty loop
-                i_acd_loop += int(I_CHUNK_NUM_FIELDS)
-                continue
-            # Fetch last edge's parameters and transform its start vertex
-            i_acd_edge_last = \
-                i_acd_loop + int(I_CHUNK_NUM_FIELDS) * num_edges_loop
-
-            # Get x and y, propagating sign bit because Viper sucks
-            x = arr_chunk_data[i_acd_edge_last + int(I_CHUNK_EDGE_X_B)]
-            x = (x << 16) >> 16
-            y = arr_chunk_data[i_acd_edge_last + int(I_CHUNK_EDGE_Y_B)]
-            y = (y << 16) >> 16
-            # scale -> f10
-            x *= scale_f10
-            y *= scale_f10
-            # rotate -> f20
-            x_b = x * cos_f10 - y * sin_f10
-            y_b = x * sin_f10 + y * cos_f10
-            # back to int and translate if needed
-            x_b = ((x_b + 0x80000) >> 20) + maybe_translate_screen_x
-            y_b = ((y_b + 0x80000) >> 20) + maybe_translate_screen_y
-
-            region_line = \
-                arr_chunk_data[i_acd_edge_last + int(I_CHUNK_EDGE_REGION_LINE)]
-            payload_line = i_acd_edge_last >> 2
-            # Add edge *ending* at each edge in loop
-            i_acd_edge = i_acd_loop + int(I_CHUNK_NUM_FIELDS)
-            i_acd_loop = i_acd_edge_last + int(I_CHUNK_NUM_FIELDS)
-            while i_acd_edge < i_acd_loop:
+        chunk_data = self.chunk_data
+        # Per-field chunk data; fields 1-3 mean different things for loops and
+        # edges
+        arr_chunk_loop = ptr16(chunk_data.arr_chunk_field0)
+        arr_chunk_x_b_region_fill = ptr16(chunk_data.arr_chunk_field1)
+        arr_chunk_y_b = ptr16(chunk_data.arr_chunk_field2)
+        arr_chunk_region_line = ptr16(chunk_data.arr_chunk_field3)
+        # Will achieve translation w/ rasterizer's window. Use combined scale
+        # and rotation so each vertex needs only the rotate multiplies.
+        scale_cos_f20 = int(self.scale_cos_f20)
+        scale_sin_f20 = int(self.scale_sin_f20)
+        xs = ptr16(arr_xs_scratch)
+        ys = ptr16(arr_ys_scratch)
+        add_edge_line_fill = rasterizer.add_edge_line_fill
+        num_chunks = int(chunk_data.num_chunks)
+
+        # Transform each edge chunk's begin vertex exactly once
+        i_chunk = int(0)
+        while i_chunk < num_chunks:
+            if not arr_chunk_loop[i_chunk]:
                 # Get x and y, propagating sign bit because Viper sucks
-                x = arr_chunk_data[i_acd_edge + int(I_CHUNK_EDGE_X_B)]
+                x = arr_chunk_x_b_region_fill[i_chunk]
                 x = (x << 16) >> 16
-                y = arr_chunk_data[i_acd_edge + int(I_CHUNK_EDGE_Y_B)]
+                y = arr_chunk_y_b[i_chunk]
                 y = (y << 16) >> 16
-                # scale -> f10
-                x *= scale_f10
-                y *= scale_f10
-                # rotate -> f20
-                x_e = x * cos_f10 - y * sin_f10
-                y_e = x * sin_f10 + y * cos_f10
-                # back to int and translate if needed
-                x_e = ((x_e + 0x80000) >> 20) + maybe_translate_screen_x
-                y_e = ((y_e + 0x80000) >> 20) + maybe_translate_screen_y
-
-                rasterizer.add_edge_line_fill(x_b, y_b, x_e, y_e, region_line,
-                                              region_fill, payload_line,
-                                              payload_fill, mask_layer)
-                x_b = x_e
-                y_b = y_e
-                region_line = \
-                    arr_chunk_data[i_acd_edge + int(I_CHUNK_EDGE_REGION_LINE)]
-                payload_line = i_acd_edge >> 2
-                i_acd_edge += int(I_CHUNK_NUM_FIELDS)
-            # (Already advanced loop index to next loop above)
+                # scale and rotate -> f20, then back to int
+                xs[i_chunk] = \
+                    (x * scale_cos_f20 - y * scale_sin_f20 + 0x80000) >> 20
+                ys[i_chunk] = \
+                    (x * scale_sin_f20 + y * scale_cos_f20 + 0x80000) >> 20
+            i_chunk += 1
+
+        # Add each edge to rasterizer, reading its transformed endpoints. The
+        # last edge of each loop ends at the loop's first vertex.
+        mask_layer = int(0)
+        region_fill = int(0)
+        payload_fill = int(0)
+        i_first = int(0)
+        i_chunk = int(0)
+        while i_chunk < num_chunks:
+            mask_trigger_layer = arr_chunk_loop[i_chunk]
+            if mask_trigger_layer:
+                # Loop header. Fetch parameters of the loop.
+                mask_trigger = mask_trigger_layer >> 8
+                mask_layer = mask_trigger_layer & 0xff
+                region_fill = arr_chunk_x_b_region_fill[i_chunk]
+                payload_fill = region_fill | int(MGS_PAYLOAD_BITS_NON_WALL)
+                if mask_trigger:
+                    payload_fill |= int(MGS_PAYLOAD_BIT_TRIGGER) | \
+                        (mask_trigger << int(MGS_PAYLOAD_SHIFT_MASK_TRIGGER))
+                i_chunk += 1
+                i_first = i_chunk
+                continue
+
+            # Edge. Find end vertex, looping back if needed.
+            i_chunk_e = i_chunk + 1
+            if arr_chunk_loop[i_chunk_e]:
+                i_chunk_e = i_first
+            x_b = (xs[i_chunk] << 16) >> 16
+            y_b = (ys[i_chunk] << 16) >> 16
+            x_e = (xs[i_chunk_e] << 16) >> 16
+            y_e = (ys[i_chunk_e] << 16) >> 16
+            region_line = arr_chunk_region_line[i_chunk]
+            add_edge_line_fill(x_b, y_b, x_e, y_e, region_line, region_fill,
+                               i_chunk, payload_fill, mask_layer)
+            i_chunk += 1
 
     @micropython.native
     def _maybe_update_rasterizer_geometry(self):
@@ -553,24 +878,25 @@ class TransformedRasterizer:
     @micropython.native
     def _update_fill_patterns(self):
         # See how much last-draw world point moved on screen
-        xs_f10, ys_f10 = \
-            self.world_to_screen_f10(
-                self.xw_last_draw_f10, self.yw_last_draw_f10)
+        xs, ys = self._world_to_screen_int(self.xw_last_draw_f10,
+                                           self.yw_last_draw_f10)
         # Translate fill per that delta
-        self.delta_x_accum += ((xs_f10 + 0x200) >> 10) - self.xs_last_draw
-        self.delta_y_accum += ((ys_f10 + 0x200) >> 10) - self.ys_last_draw
+        self.delta_x_accum += xs - self.xs_last_draw
+        self.delta_y_accum += ys - self.ys_last_draw
         self.delta_x_accum &= 0x7
         self.delta_y_accum &= 0x7
-        set_fill_bytes_draw(self.delta_x_accum, self.delta_y_accum,
-                            self.angle_wd)
+        fill_key = (self.delta_x_accum, self.delta_y_accum, self.angle_wd,
+                    (utils.ticks_ms() >> 8) & 0x3, utils.use_gray)
+        if fill_key != self.last_fill_key:
+            set_fill_bytes_draw(self.delta_x_accum, self.delta_y_accum,
+                                self.angle_wd)
+            self.last_fill_key = fill_key
         # Stash upcoming draw's world and screen points as last draw
         self.xw_last_draw_f10 = self.xw_next_draw_f10
         self.yw_last_draw_f10 = self.yw_next_draw_f10
-        xs_f10, ys_f10 = \
-            self.world_to_screen_f10(
-                self.xw_last_draw_f10, self.yw_last_draw_f10)
-        self.xs_last_draw = (xs_f10 + 0x200) >> 10
-        self.ys_last_draw = (ys_f10 + 0x200) >> 10
+        self.xs_last_draw, self.ys_last_draw = \
+            self._world_to_screen_int(self.xw_last_draw_f10,
+                                      self.yw_last_draw_f10)
 
     # Rasterizes all scene geometry to the display such that (0, 0) in the
     # current transform's screen space maps to the top left of the display
@@ -595,13 +921,27 @@ class TransformedRasterizer:
     def rasterize_payload(self, payload_buffer, mask_layer):
         self._maybe_update_rasterizer_geometry()
         # Rasterize edges, applying final screen-space translate via window
-        payload_buffer.fill(MGS_REGION_EMPTY | MGS_PAYLOAD_BIT_NON_WALL)
+        payload_buffer.fill(MGS_REGION_EMPTY | MGS_PAYLOAD_BITS_NON_WALL)
         self.rasterizer.rasterize_to_buffer(
-            payload_buffer.buffer, payload_buffer.buffer,
+            payload_buffer.buffer, payload_buffer.buffer_high,
             SR_BUFFER_TYPE_PAYLOAD, mask_layer, -self.translate_screen_x,
             -self.translate_screen_y, payload_buffer.width,
             payload_buffer.height)
 
+    # Sizes the payload buffer and rasterizes to it at unit scale, rotated by
+    # angle_degrees and translated so (xw, yw) in world space lands at (xs, ys)
+    # in the payload buffer -- one call for the physics step's whole setup
+    @micropython.native
+    def prepare_and_rasterize_payload(self, payload_buffer, width, height,
+                                      angle_degrees, xw_f10, yw_f10, xs_f10,
+                                      ys_f10, mask_layer):
+        payload_buffer.set_dimensions(width, height)
+        self.set_scale_f10(1024)
+        self.set_angle_wd(angle_degrees)
+        self.set_translate_map_world_to_screen_f10(xw_f10, yw_f10, xs_f10,
+                                                   ys_f10)
+        self.rasterize_payload(payload_buffer, mask_layer)
+
     # Draws the edge corresponding to i_chunk to the screen using thumby.display
     # using the current transform
     @micropython.native
@@ -612,15 +952,19 @@ class TransformedRasterizer:
            self.chunk_data.chunk_is_loop(i_chunk):
             return
         # Get world-space endpoints from chunk
-        xw_b, yw_b, xw_e, yw_e = \
-            self.chunk_data.chunk_edge_get_endpoints(i_chunk)
+        arr_endpoints = self.arr_endpoints
+        self.chunk_data.chunk_edge_get_endpoints_into(i_chunk, arr_endpoints)
+        xw_b = arr_endpoints[0]
+        yw_b = arr_endpoints[1]
+        xw_e = arr_endpoints[2]
+        yw_e = arr_endpoints[3]
         # Transform endpoints to screen space
-        xs_b_f10, ys_b_f10 = self.world_to_screen_f10(xw_b << 10, yw_b << 10)
-        xs_e_f10, ys_e_f10 = self.world_to_screen_f10(xw_e << 10, yw_e << 10)
-        xs_b = ((xs_b_f10 + 0x200) >> 10) + debug_offset_x
-        ys_b = ((ys_b_f10 + 0x200) >> 10) + debug_offset_y
-        xs_e = ((xs_e_f10 + 0x200) >> 10) + debug_offset_x
-        ys_e = ((ys_e_f10 + 0x200) >> 10) + debug_offset_y
+        xs_b, ys_b = self._world_to_screen_int(xw_b << 10, yw_b << 10)
+        xs_e, ys_e = self._world_to_screen_int(xw_e << 10, yw_e << 10)
+        xs_b += debug_offset_x
+        ys_b += debug_offset_y
+        xs_e += debug_offset_x
+        ys_e += debug_offset_y
         # Rasterize screen-space line
         display.drawLine(xs_b, ys_b, xs_e, ys_e, color)
 
@@ -634,9 +978,15 @@ BALL_RADIUS_FLOOR = const(2)
 BALL_HOLE_DIAMETER = const(9)
 BALL_HOLE_RADIUS_FLOOR = const(4)
 BALL_HOLE_RADIUS_SQ_F20 = const(21233664)
+BALL_HOLE_RADIUS_F10 = const(BALL_HOLE_DIAMETER << 9)
 BALL_HOLE_SLOW_F20 = const(10240)
 BALL_HOLE_ANG_DEFLECT = const(60)
 BALL_HOLE_MAX_SPEED_ENTER_F10 = const(110)
+# Rounded-up f16 reciprocals standing in for divides in the hole path
+BALL_HOLE_RECIP_MAX_SPEED_ENTER_F16 = const(
+    (65535 + BALL_HOLE_MAX_SPEED_ENTER_F10) // BALL_HOLE_MAX_SPEED_ENTER_F10)
+BALL_HOLE_RECIP_DIAMETER_F16 = const(
+    (65535 + BALL_HOLE_DIAMETER) // BALL_HOLE_DIAMETER)
 
 # Friction coefficients. Units? What units?
 BALL_COEFF_GRASS_F20 = const(15)
@@ -648,198 +998,380 @@ BALL_COEFF_SLOPE_F20 = const(128)
 BALL_COEFF_A = const(3)
 BALL_DELTA_W_STOPPED_F10 = const(1024)
 BALL_MS_BEFORE_STOPPED = const(500)
+# At or above this speed, only update stopped tracking every fourth timestep,
+# over the accumulated ms
+BALL_STOPPED_COARSE_F20 = const(32768)
 BALL_MS_BEFORE_SINK = const(100)
 
+# Fields of BallState.arr_state
+# Location (world space, fixed precision)
+I_BALL_XW_F10 = const(0)
+I_BALL_YW_F10 = const(1)
+# Velocity, as angle (wrapped degrees) and speed (world units per ms)
+I_BALL_V_ANGLE_WD = const(2)
+I_BALL_V_W_PER_MS_F20 = const(3)
+# The chunk indices of the up to two edges the ball collided with during the
+# last timestep, or -1
+I_BALL_MAYBE_I_CHUNK_CONTACT0 = const(4)
+I_BALL_MAYBE_I_CHUNK_CONTACT1 = const(5)
+# The layer(s) currently occupied by the ball / to be drawn
+I_BALL_MASK_LAYER = const(6)
+# Tracking water contact and resetting to position before
+I_BALL_WATER_MS = const(7)
+I_BALL_IN_WATER = const(8)
+I_BALL_XW_LAST_SHOT_F10 = const(9)
+I_BALL_YW_LAST_SHOT_F10 = const(10)
+# Location of hole
+I_BALL_XW_HOLE_F10 = const(11)
+I_BALL_YW_HOLE_F10 = const(12)
+I_BALL_ON_SAND = const(13)
+# Status of ball relative to hole
+I_BALL_IN_HOLE = const(14)
+I_BALL_IGNORE_HOLE_LINE = const(15)
+# Done-moving tracking
+I_BALL_IS_STOPPED = const(16)
+I_BALL_MS_BELOW_STOP_THRESHOLD = const(17)
+I_BALL_XW_EXP_AVG_F10 = const(18)
+I_BALL_YW_EXP_AVG_F10 = const(19)
+# Lower bound on how far the ball will be from reaching the hole (per axis,
+# beyond the hole radius) after the current timestep; 0 if unknown. Lets
+# advance() skip the hole check while the ball is far away.
+I_BALL_HOLE_CLEARANCE_F10 = const(20)
+# Timesteps seen and ms not yet applied by coarse stopped tracking
+I_BALL_STOPPED_TICKS = const(21)
+I_BALL_STOPPED_MS_PENDING = const(22)
+I_BALL_XW_STOPPED_LAST_F10 = const(23)
+I_BALL_YW_STOPPED_LAST_F10 = const(24)
+# Whether the last collision step found the ball resting -- not moving, not
+# touching edges, water, or slopes, and not changing layer -- so that repeating
+# it while the ball stays at rest would change nothing
+I_BALL_AT_REST = const(25)
+I_BALL_NUM_FIELDS = const(26)
+
+# Results of scan_payload_regions(): numbers of contact buckets touching grass,
+# sand, and (mostly) water, signed slope bucket counts, and the mask layer after
+# any triggers
+I_SCAN_COUNT_GRASS = const(0)
+I_SCAN_COUNT_SAND = const(1)
+I_SCAN_COUNT_WATER = const(2)
+I_SCAN_SIGNED_COUNT_SLOPE_X = const(3)
+I_SCAN_SIGNED_COUNT_SLOPE_Y = const(4)
+I_SCAN_MASK_LAYER = const(5)
+I_SCAN_NUM_FIELDS = const(6)
+arr_scan_regions = array('l', range(I_SCAN_NUM_FIELDS))
+
+# Region pass of the collision scan over a BALL_DIAMETER-wide payload buffer.
+# Visits rows [0, i_row_end) for region contact and layer triggers, treating
+# rows up to BALL_DIAMETER - 1 as one bucket (the starting footprint) and each
+# later row before i_row_count_end as its own bucket. Edge cells are skipped.
+@micropython.viper
+def scan_payload_regions(buffer, buffer_high, i_row_end:int,
+                         i_row_count_end:int, mask_layer:int, out:ptr32):
+    pb = ptr8(buffer)
+    pb_high = ptr8(buffer_high)
+    region_flags = ptr8(bytes_mgs_region_flags)
+    count_grass = int(0)
+    count_sand = int(0)
+    count_water = int(0)
+    touch_grass = int(0)
+    touch_sand = int(0)
+    count_water_row = int(0)
+    signed_count_slope_x = int(0)
+    signed_count_slope_y = int(0)
+    signed_incr_slope_x = int(0)
+    signed_incr_slope_y = int(0)
+    i_row_count_first = int(BALL_DIAMETER) - 1
+    i_row = int(0)
+    i_payload = int(0)
+    while i_row < i_row_end:
+        i_payload_row_end = i_payload + int(BALL_DIAMETER)
+        while i_payload < i_payload_row_end:
+            payload = pb[i_payload]
+            # Skip edges -- handled by the edge pass
+            if payload >= int(MGS_PAYLOAD_BITS_NON_WALL):
+                # Track contact with relevant regions
+                flags = region_flags[payload & int(MGS_PAYLOAD_MASK_REGION)]
+                touch_grass |= flags & int(MGS_FLAG_GRASS)
+                touch_sand |= flags & int(MGS_FLAG_SAND)
+                count_water_row += (flags >> 2) & 1
+                # Slopes are rare -- only then branch (last slope wins)
+                if flags & int(MGS_FLAGS_SLOPE_Y):
+                    signed_incr_slope_y = \
+                        ((flags >> 3) & 1) - ((flags >> 4) & 1)
+                if flags & int(MGS_FLAGS_SLOPE_X):
+                    signed_incr_slope_x = \
+                        ((flags >> 5) & 1) - ((flags >> 6) & 1)
+                # Update mask_layer if this is a trigger (last wins)
+                if payload & int(MGS_PAYLOAD_BIT_TRIGGER):
+                    mask_layer = pb_high[i_payload]
+            i_payload += 1
+        # Update region contact counts, treating entire starting footprint as
+        # one bucket and then individual successive rows
+        if i_row >= i_row_count_first and i_row < i_row_count_end:
+            if touch_grass:
+                count_grass += 1
+                touch_grass = 0
+            if touch_sand:
+                count_sand += 1
+                touch_sand = 0
+            if count_water_row > int(BALL_RADIUS_FLOOR):
+                count_water += 1
+            count_water_row = 0
+            signed_count_slope_x += signed_incr_slope_x
+            signed_count_slope_y += signed_incr_slope_y
+            signed_incr_slope_x = int(0)
+            signed_incr_slope_y = int(0)
+        i_row += 1
+    out[int(I_SCAN_COUNT_GRASS)] = count_grass
+    out[int(I_SCAN_COUNT_SAND)] = count_sand
+    out[int(I_SCAN_COUNT_WATER)] = count_water
+    out[int(I_SCAN_SIGNED_COUNT_SLOPE_X)] = signed_count_slope_x
+    out[int(I_SCAN_SIGNED_COUNT_SLOPE_Y)] = signed_count_slope_y
+    out[int(I_SCAN_MASK_LAYER)] = mask_layer
+
 # The physics state of a golf ball. Operates on outside state describing the
 # scene geometry and an outside rasterizer for collision detection.
 class BallState:
     def __init__(self):
-        # Location (world space, fixed precision)
-        self.xw_f10 = 0
-        self.yw_f10 = 0
-        # Velocity, as angle (wrapped degrees) and speed (world units per ms)
-        self.v_angle_wd = 0
-        self.v_w_per_ms_f20 = 0
-        # The chunk indices of the up to two edges the ball collided with during
-        # the last timestep, or -1
-        self.maybe_i_chunk_contact0 = -1
-        self.maybe_i_chunk_contact1 = -1
-        # The layer(s) currently occupied by the ball / to be drawn
-        self.mask_layer = 0xf
-        # Tracking water contact and resetting to position before
-        self.water_ms = 0
-        self.in_water = False
-        self.xw_last_shot_f10 = 0
-        self.yw_last_shot_f10 = 0
-        # Location of hole
-        self.xw_hole_f10 = 0
-        self.yw_hole_f10 = 0
-        self.on_sand = False
-        # Status of ball relative to hole
-        self.in_hole = False
-        self.ignore_hole_line = False
-        # Done-moving tracking
-        self.is_stopped = False
-        self.ms_below_stop_threshold = 0
-        self.xw_exp_avg_f10 = 0
-        self.yw_exp_avg_f10 = 0
+        # Numeric state indexed by I_BALL_*, in an array rather than attributes
+        # so Viper code can read and write it
+        self.arr_state = array('l', range(I_BALL_NUM_FIELDS))
+        arr_state = self.arr_state
+        for i in range(I_BALL_NUM_FIELDS):
+            arr_state[i] = 0
+        arr_state[I_BALL_MAYBE_I_CHUNK_CONTACT0] = -1
+        arr_state[I_BALL_MAYBE_I_CHUNK_CONTACT1] = -1
+        arr_state[I_BALL_MASK_LAYER] = 0xf
+        # Collision test results per edge chunk, as (v_angle_wd << 1) | hit for
+        # the velocity angle they were computed at, or 0xffff if unknown
+        self.arr_edge_hit_memo = array('H', range(MAX_NUM_CHUNKS))
+        self._clear_edge_hit_memo()
+
+    # Read-only access to state used outside of BallState
+    @property
+    def xw_f10(self):
+        return self.arr_state[I_BALL_XW_F10]
+
+    @property
+    def yw_f10(self):
+        return self.arr_state[I_BALL_YW_F10]
+
+    @property
+    def v_angle_wd(self):
+        return self.arr_state[I_BALL_V_ANGLE_WD]
+
+    @property
+    def mask_layer(self):
+        return self.arr_state[I_BALL_MASK_LAYER]
+
+    @property
+    def in_water(self):
+        return bool(self.arr_state[I_BALL_IN_WATER])
+
+    @property
+    def xw_last_shot_f10(self):
+        return self.arr_state[I_BALL_XW_LAST_SHOT_F10]
+
+    @property
+    def yw_last_shot_f10(self):
+        return self.arr_state[I_BALL_YW_LAST_SHOT_F10]
+
+    @property
+    def in_hole(self):
+        return bool(self.arr_state[I_BALL_IN_HOLE])
+
+    @property
+    def is_stopped(self):
+        return bool(self.arr_state[I_BALL_IS_STOPPED])
 
     def update_last_shot(self):
-        self.xw_last_shot_f10 = self.xw_f10
-        self.yw_last_shot_f10 = self.yw_f10
+        arr_state = self.arr_state
+        arr_state[I_BALL_XW_LAST_SHOT_F10] = arr_state[I_BALL_XW_F10]
+        arr_state[I_BALL_YW_LAST_SHOT_F10] = arr_state[I_BALL_YW_F10]
 
     def move_to_last_shot(self):
-        self.xw_f10 = self.xw_last_shot_f10
-        self.yw_f10 = self.yw_last_shot_f10
+        arr_state = self.arr_state
+        arr_state[I_BALL_XW_F10] = arr_state[I_BALL_XW_LAST_SHOT_F10]
+        arr_state[I_BALL_YW_F10] = arr_state[I_BALL_YW_LAST_SHOT_F10]
         self._reset_ball()
 
     @micropython.native
     def set_mask_layer(self, mask_layer):
-        self.mask_layer = mask_layer
+        arr_state = self.arr_state
+        arr_state[I_BALL_MASK_LAYER] = mask_layer
+        arr_state[I_BALL_AT_REST] = 0
 
     @micropython.native
     def _set_on_sand(self, on_sand):
-        self.on_sand = on_sand
+        arr_state = self.arr_state
+        arr_state[I_BALL_ON_SAND] = 1 if on_sand else 0
 
     @micropython.native
     def _set_water_status(self, water_ms):
-        self.water_ms = water_ms
+        arr_state = self.arr_state
+        arr_state[I_BALL_WATER_MS] = water_ms
         if water_ms > BALL_MS_BEFORE_SINK:
-            self.in_water = True
-            self.is_stopped = True
+            arr_state[I_BALL_IN_WATER] = 1
+            arr_state[I_BALL_IS_STOPPED] = 1
 
     @micropython.native
     def _reset_is_stopped(self):
-        self.is_stopped = False
-        self.ms_below_stop_threshold = 0
+        arr_state = self.arr_state
+        arr_state[I_BALL_IS_STOPPED] = 0
+        arr_state[I_BALL_MS_BELOW_STOP_THRESHOLD] = 0
+        arr_state[I_BALL_STOPPED_MS_PENDING] = 0
+        arr_state[I_BALL_XW_STOPPED_LAST_F10] = arr_state[I_BALL_XW_F10]
+        arr_state[I_BALL_YW_STOPPED_LAST_F10] = arr_state[I_BALL_YW_F10]
         # Bias exp avg away from ball to prolong animation
-        self.xw_exp_avg_f10 = self.xw_f10 + 4096
-        self.yw_exp_avg_f10 = self.yw_f10 + 4096
+        arr_state[I_BALL_XW_EXP_AVG_F10] = arr_state[I_BALL_XW_F10] + 4096
+        arr_state[I_BALL_YW_EXP_AVG_F10] = arr_state[I_BALL_YW_F10] + 4096
 
     @micropython.native
     def _reset_ball(self):
-        self.maybe_i_chunk_contact0 = -1
-        self.maybe_i_chunk_contact1 = -1
-        self.in_hole = False
-        self.ignore_hole_line = False
-        self.is_stopped = False
-        self.ms_below_stop_threshold = 0
+        arr_state = self.arr_state
+        arr_state[I_BALL_MAYBE_I_CHUNK_CONTACT0] = -1
+        arr_state[I_BALL_MAYBE_I_CHUNK_CONTACT1] = -1
+        arr_state[I_BALL_IN_HOLE] = 0
+        arr_state[I_BALL_IGNORE_HOLE_LINE] = 0
+        arr_state[I_BALL_HOLE_CLEARANCE_F10] = 0
+        arr_state[I_BALL_AT_REST] = 0
+        arr_state[I_BALL_IS_STOPPED] = 0
+        arr_state[I_BALL_MS_BELOW_STOP_THRESHOLD] = 0
+        arr_state[I_BALL_STOPPED_MS_PENDING] = 0
+        arr_state[I_BALL_XW_STOPPED_LAST_F10] = arr_state[I_BALL_XW_F10]
+        arr_state[I_BALL_YW_STOPPED_LAST_F10] = arr_state[I_BALL_YW_F10]
         # TODO: bias initial values away from ball pos itself if needed
-        self.xw_exp_avg_f10 = self.xw_f10
-        self.yw_exp_avg_f10 = self.yw_f10
-        self.water_ms = 0
-        self.in_water = False
-        self.xw_last_shot_f10 = self.xw_f10
-        self.yw_last_shot_f10 = self.yw_f10
+        arr_state[I_BALL_XW_EXP_AVG_F10] = arr_state[I_BALL_XW_F10]
+        arr_state[I_BALL_YW_EXP_AVG_F10] = arr_state[I_BALL_YW_F10]
+        arr_state[I_BALL_WATER_MS] = 0
+        arr_state[I_BALL_IN_WATER] = 0
+        arr_state[I_BALL_XW_LAST_SHOT_F10] = arr_state[I_BALL_XW_F10]
+        arr_state[I_BALL_YW_LAST_SHOT_F10] = arr_state[I_BALL_YW_F10]
 
     @micropython.native
-    def _set_location_f10(self, xw_f10, yw_f10):
-        self.xw_f10 = xw_f10
-        self.yw_f10 = yw_f10
+    def _clear_edge_hit_memo(self):
+        arr_edge_hit_memo = self.arr_edge_hit_memo
+        for i in range(MAX_NUM_CHUNKS):
+            arr_edge_hit_memo[i] = 0xffff
 
     @micropython.native
     def reset_location_f10(self, xw_f10, yw_f10):
-        self._set_location_f10(xw_f10, yw_f10)
-        self.on_sand = False
+        arr_state = self.arr_state
+        arr_state[I_BALL_XW_F10] = xw_f10
+        arr_state[I_BALL_YW_F10] = yw_f10
+        arr_state[I_BALL_ON_SAND] = 0
         self._reset_ball()
-
-    @micropython.native
-    def _set_hole_status(self, in_hole, ignore_hole_line):
-        self.in_hole = in_hole
-        self.ignore_hole_line = ignore_hole_line
+        # Ball may be on a new level, whose edges have different normals
+        self._clear_edge_hit_memo()
 
     @micropython.native
     def set_location_hole_f10(self, xw_hole_f10, yw_hole_f10):
-        self.xw_hole_f10 = xw_hole_f10
-        self.yw_hole_f10 = yw_hole_f10
-        self._set_hole_status(False, False)
-
-    @micropython.native
-    def _set_velocity_wd_f20(self, angle_wd, w_per_ms_f20):
-        self.v_angle_wd = wd_init(angle_wd)
-        self.v_w_per_ms_f20 = w_per_ms_f20
+        arr_state = self.arr_state
+        arr_state[I_BALL_XW_HOLE_F10] = xw_hole_f10
+        arr_state[I_BALL_YW_HOLE_F10] = yw_hole_f10
+        arr_state[I_BALL_IN_HOLE] = 0
+        arr_state[I_BALL_IGNORE_HOLE_LINE] = 0
+        arr_state[I_BALL_HOLE_CLEARANCE_F10] = 0
 
     @micropython.native
     def reset_velocity_wd_f20(self, angle_wd, w_per_ms_f20):
-        self._set_velocity_wd_f20(angle_wd, w_per_ms_f20)
+        arr_state = self.arr_state
+        arr_state[I_BALL_V_ANGLE_WD] = wd_init(angle_wd)
+        arr_state[I_BALL_V_W_PER_MS_F20] = w_per_ms_f20
         self._reset_ball()
 
     @micropython.native
     def _set_velocity_vector_f10(self, xw_per_ms_f10, yw_per_ms_f10):
+        arr_state = self.arr_state
         if xw_per_ms_f10 == 0 and yw_per_ms_f10 == 0:
             # Preserve old orientation and zero out speed
-            self._set_velocity_wd_f20(self.v_angle_wd, 0)
+            arr_state[I_BALL_V_W_PER_MS_F20] = 0
             return
-        angle_degrees = int(math.atan2(yw_per_ms_f10, xw_per_ms_f10)
-            * COEFF_RADIANS_TO_DEGREES + 0.5)
+        # Add half a degree and truncate towards zero, as int(x + 0.5) did for
+        # the float angle
+        angle_f8 = atan2_degrees_f8(yw_per_ms_f10, xw_per_ms_f10) + 128
+        if angle_f8 >= 0:
+            angle_degrees = angle_f8 >> 8
+        else:
+            angle_degrees = -((-angle_f8) >> 8)
         angle_wd = angle_degrees % 360
         norm_squared_f20 = \
             xw_per_ms_f10 * xw_per_ms_f10 + yw_per_ms_f10 * yw_per_ms_f10
         # TODO: cap speed?
-        w_per_ms_f20 = int(math.sqrt(norm_squared_f20)) << 10
-        self._set_velocity_wd_f20(angle_wd, w_per_ms_f20)
-
-    @micropython.native
-    def _set_maybe_i_chunk_contact(self, maybe_i_chunk_contact0,
-                                   maybe_i_chunk_contact1):
-        self.maybe_i_chunk_contact0 = maybe_i_chunk_contact0
-        self.maybe_i_chunk_contact1 = maybe_i_chunk_contact1
+        w_per_ms_f20 = sqrt_int(norm_squared_f20) << 10
+        arr_state[I_BALL_V_ANGLE_WD] = angle_wd
+        arr_state[I_BALL_V_W_PER_MS_F20] = w_per_ms_f20
 
     @micropython.native
     def location_after_delta_ms_f10(self, delta_ms):
-        v_angle_wd = self.v_angle_wd
-        v_w_per_ms_f10 = (self.v_w_per_ms_f20 + 0x200) >> 10
+        arr_state = self.arr_state
+        v_angle_wd = arr_state[I_BALL_V_ANGLE_WD]
+        v_w_per_ms_f10 = (arr_state[I_BALL_V_W_PER_MS_F20] + 0x200) >> 10
 
         delta_w_f10 = v_w_per_ms_f10 * delta_ms
 
         delta_xw_f10 = (cos_wd_f10(v_angle_wd) * delta_w_f10 + 0x200) >> 10
         delta_yw_f10 = (sin_wd_f10(v_angle_wd) * delta_w_f10 + 0x200) >> 10
 
-        return self.xw_f10 + delta_xw_f10, self.yw_f10 + delta_yw_f10
+        return arr_state[I_BALL_XW_F10] + delta_xw_f10, \
+               arr_state[I_BALL_YW_F10] + delta_yw_f10
 
     # Returns true if this helper has handled the timestep
     @micropython.viper
     def _maybe_advance_to_hole_interaction(self, delta_ms:int) -> bool:
+        arr_state = ptr32(self.arr_state)
         # Fetch parameters
-        xw_f10 = int(self.xw_f10)
-        yw_f10 = int(self.yw_f10)
-        xw_hole_f10 = int(self.xw_hole_f10)
-        yw_hole_f10 = int(self.yw_hole_f10)
-        v_angle_wd = int(self.v_angle_wd)
-        v_w_per_ms_f20 = int(self.v_w_per_ms_f20)
-        in_hole = bool(self.in_hole)
-        ignore_hole_line = bool(self.ignore_hole_line)
+        xw_f10 = arr_state[int(I_BALL_XW_F10)]
+        yw_f10 = arr_state[int(I_BALL_YW_F10)]
+        xw_hole_f10 = arr_state[int(I_BALL_XW_HOLE_F10)]
+        yw_hole_f10 = arr_state[int(I_BALL_YW_HOLE_F10)]
+        v_angle_wd = arr_state[int(I_BALL_V_ANGLE_WD)]
+        v_w_per_ms_f20 = arr_state[int(I_BALL_V_W_PER_MS_F20)]
+        in_hole = arr_state[int(I_BALL_IN_HOLE)] != 0
+        ignore_hole_line = arr_state[int(I_BALL_IGNORE_HOLE_LINE)] != 0
+        # Invalidate clearance unless it's re-established below
+        arr_state[int(I_BALL_HOLE_CLEARANCE_F10)] = 0
         # Early out if already in hole
         if in_hole:
             # Animate ball towards hole center -- is-stopped detection will
             # eventually fire and stop this
             a_f10 = int(BALL_COEFF_A) * delta_ms
+            one_minus_a_f10 = 1024 - a_f10
             xw_f10 = \
-                (a_f10 * xw_hole_f10 + (1024 - a_f10) * xw_f10 + 0x200) >> 10
+                (a_f10 * xw_hole_f10 + one_minus_a_f10 * xw_f10 + 0x200) >> 10
             yw_f10 = \
-                (a_f10 * yw_hole_f10 + (1024 - a_f10) * yw_f10 + 0x200) >> 10
-            self._set_location_f10(xw_f10, yw_f10)
+                (a_f10 * yw_hole_f10 + one_minus_a_f10 * yw_f10 + 0x200) >> 10
+            arr_state[int(I_BALL_XW_F10)] = xw_f10
+            arr_state[int(I_BALL_YW_F10)] = yw_f10
             return True  # timestep handled
 
-        # Get per-axis distances to hole for case selection below
+        # Get per-axis distances to hole for case selection below (branchless
+        # abs via sign mask)
         abs_delta_xw_to_hole_f10 = xw_hole_f10 - xw_f10
-        if abs_delta_xw_to_hole_f10 < 0:
-            abs_delta_xw_to_hole_f10 = 0 - abs_delta_xw_to_hole_f10
+        sign = abs_delta_xw_to_hole_f10 >> 31
+        abs_delta_xw_to_hole_f10 = (abs_delta_xw_to_hole_f10 ^ sign) - sign
         abs_delta_yw_to_hole_f10 = yw_hole_f10 - yw_f10
-        if abs_delta_yw_to_hole_f10 < 0:
-            abs_delta_yw_to_hole_f10 = 0 - abs_delta_yw_to_hole_f10
+        sign = abs_delta_yw_to_hole_f10 >> 31
+        abs_delta_yw_to_hole_f10 = (abs_delta_yw_to_hole_f10 ^ sign) - sign
 
         # Consider effect of distance of ball *start* to hole
-        hole_radius_f10 = int(BALL_HOLE_DIAMETER) << 9
+        hole_radius_f10 = int(BALL_HOLE_RADIUS_F10)
         w_range_f10 = (v_w_per_ms_f20 * delta_ms + 0x200) >> 10
         if abs_delta_xw_to_hole_f10 > hole_radius_f10 or \
            abs_delta_yw_to_hole_f10 > hole_radius_f10:
             # Not starting near hole. Re-enable ball-line intersection logic.
             ignore_hole_line = bool(False)
-            self._set_hole_status(in_hole, ignore_hole_line)
+            arr_state[int(I_BALL_IGNORE_HOLE_LINE)] = 0
             # Exit early if ball can't reach hole in timestep
             if abs_delta_xw_to_hole_f10 - w_range_f10 > hole_radius_f10 or\
                abs_delta_yw_to_hole_f10 - w_range_f10 > hole_radius_f10:
+                # Ball moves at most w_range_f10 per axis in this timestep,
+                # so remember how far it will still be from reaching the hole
+                clearance_f10 = abs_delta_xw_to_hole_f10
+                if abs_delta_yw_to_hole_f10 > clearance_f10:
+                    clearance_f10 = abs_delta_yw_to_hole_f10
+                arr_state[int(I_BALL_HOLE_CLEARANCE_F10)] = \
+                    clearance_f10 - w_range_f10 - hole_radius_f10
                 return False  # timestep not handled
         elif v_w_per_ms_f20 < int(BALL_HOLE_SLOW_F20):
             # Ball is close to hole and moving slowly. Allow it to roll into
@@ -848,8 +1380,7 @@ class BallState:
                 abs_delta_xw_to_hole_f10 * abs_delta_xw_to_hole_f10 +\
                 abs_delta_yw_to_hole_f10 * abs_delta_yw_to_hole_f10
             if dist_w_sq_to_hole_f20 < int(BALL_HOLE_RADIUS_SQ_F20):
-                in_hole = bool(True)
-                self._set_hole_status(in_hole, ignore_hole_line)
+                arr_state[int(I_BALL_IN_HOLE)] = 1
                 self._reset_is_stopped()  # allow anim. to hole center to play
                 return True  # timestep handled
 
@@ -879,11 +1410,11 @@ class BallState:
         yw_f10 += (dist_signed_w_to_intersect_f10 * vy_unit_f10 + 0x200) >> 10
         # Stop if intersection position is too far from hole
         abs_delta_xw_to_hole_f10 = xw_hole_f10 - xw_f10
-        if abs_delta_xw_to_hole_f10 < 0:
-            abs_delta_xw_to_hole_f10 = 0 - abs_delta_xw_to_hole_f10
+        sign = abs_delta_xw_to_hole_f10 >> 31
+        abs_delta_xw_to_hole_f10 = (abs_delta_xw_to_hole_f10 ^ sign) - sign
         abs_delta_yw_to_hole_f10 = yw_hole_f10 - yw_f10
-        if abs_delta_yw_to_hole_f10 < 0:
-            abs_delta_yw_to_hole_f10 = 0 - abs_delta_yw_to_hole_f10
+        sign = abs_delta_yw_to_hole_f10 >> 31
+        abs_delta_yw_to_hole_f10 = (abs_delta_yw_to_hole_f10 ^ sign) - sign
         if abs_delta_xw_to_hole_f10 > hole_radius_f10 or \
            abs_delta_yw_to_hole_f10 > hole_radius_f10:
             return False  # timestep not handled
@@ -896,29 +1427,34 @@ class BallState:
         # Ball intersects hole line within hole -- helper will own this
         # timestep. Advance ball to intersection and update velocity per grass
         # friction.
-        self._set_location_f10(xw_f10, yw_f10)
-        self._set_maybe_i_chunk_contact(-1, -1)
-        ignore_hole_line = True
-        self._set_hole_status(in_hole, ignore_hole_line)
+        arr_state[int(I_BALL_XW_F10)] = xw_f10
+        arr_state[int(I_BALL_YW_F10)] = yw_f10
+        arr_state[int(I_BALL_MAYBE_I_CHUNK_CONTACT0)] = -1
+        arr_state[int(I_BALL_MAYBE_I_CHUNK_CONTACT1)] = -1
+        arr_state[int(I_BALL_IGNORE_HOLE_LINE)] = 1
         ms_sand = (dist_signed_w_to_intersect_f10 * delta_ms) // w_range_f10
         v_w_per_ms_f20 -= int(BALL_COEFF_SAND_F20) * ms_sand
         if v_w_per_ms_f20 < 0:
             v_w_per_ms_f20 = int(0)
-        self._set_velocity_wd_f20(v_angle_wd, v_w_per_ms_f20)
+        arr_state[int(I_BALL_V_W_PER_MS_F20)] = v_w_per_ms_f20
 
         # Decide whether ball deflects or enters as a function of distance and
         # speed
-        frac_max_entry_speed_f10 = \
-            v_w_per_ms_f20 // int(BALL_HOLE_MAX_SPEED_ENTER_F10)
+        # (Reciprocal quotient may be one too large at speed -- correct it)
+        frac_max_entry_speed_f10 = (v_w_per_ms_f20 *
+            int(BALL_HOLE_RECIP_MAX_SPEED_ENTER_F16)) >> 16
+        if v_w_per_ms_f20 < \
+           frac_max_entry_speed_f10 * int(BALL_HOLE_MAX_SPEED_ENTER_F10):
+            frac_max_entry_speed_f10 -= 1
         dist_w_to_hole_f10 = int(sqrt_int(dist_w_sq_to_hole_f20))
-        frac_towards_center_f10 = \
-            1024 - ((dist_w_to_hole_f10 << 1) // int(BALL_HOLE_DIAMETER))
+        # (Exact here, since distance never exceeds hole radius)
+        frac_towards_center_f10 = 1024 - (((dist_w_to_hole_f10 << 1) *
+            int(BALL_HOLE_RECIP_DIAMETER_F16)) >> 16)
         # See if ball is close enough to hole center to enter (impossible once
         # past max entry speed)
         if frac_towards_center_f10 > frac_max_entry_speed_f10:
             # Mark ball as entering hole
-            in_hole = bool(True)
-            self._set_hole_status(in_hole, ignore_hole_line)
+            arr_state[int(I_BALL_IN_HOLE)] = 1
             self._reset_is_stopped()  # allow animation to hole center to play
             return True  # timestep handled
         # Ball will skip over hole. Decide how much (if any) to deflect
@@ -936,152 +1472,135 @@ class BallState:
             v_angle_wd = int(wd_init(v_angle_wd + delta_ang_deflect))
         else:
             v_angle_wd = int(wd_init(v_angle_wd - delta_ang_deflect))
-        self._set_velocity_wd_f20(v_angle_wd, v_w_per_ms_f20)
+        arr_state[int(I_BALL_V_ANGLE_WD)] = v_angle_wd
         return True  # timestep handled
 
     @micropython.viper
     def _advance_to_collision_axis_aligned(self, delta_ms:int,
                                            rasterizer_collision, payload_buffer,
-                                           arr_chunk_normal_wd:ptr16):
-        mask_layer = int(self.mask_layer)
-        xw_f10 = int(self.xw_f10)
-        yw_f10 = int(self.yw_f10)
-        v_angle_wd = int(self.v_angle_wd)
-        v_w_per_ms_f20 = int(self.v_w_per_ms_f20)
-        pb = ptr16(payload_buffer.buffer)
+                                           arr_chunk_normal_wd):
+        arr_state = ptr32(self.arr_state)
+        mask_layer = arr_state[int(I_BALL_MASK_LAYER)]
+        xw_f10 = arr_state[int(I_BALL_XW_F10)]
+        yw_f10 = arr_state[int(I_BALL_YW_F10)]
+        v_angle_wd = arr_state[int(I_BALL_V_ANGLE_WD)]
+        v_w_per_ms_f20 = arr_state[int(I_BALL_V_W_PER_MS_F20)]
+        # Angle doesn't change below, so evaluate its unit vector once
+        vx_unit_f10 = int(cos_wd_f10(v_angle_wd))
+        vy_unit_f10 = int(sin_wd_f10(v_angle_wd))
+        pb = ptr8(payload_buffer.buffer)
         # TODO: restrict delta_ms if too large? In what way, and where?
         # Calculate world distance traveled in delta_ms at current velocity, as
         # f10 for applying step and as int to bound collision detection work
         delta_w_f10 = (v_w_per_ms_f20 * delta_ms + 0x200) >> 10
         delta_w = (delta_w_f10 + 0x200) >> 10
-        # Set payload buffer size to receive axis-aligned rasterization
+        # Rasterize collision data for ball's current layer(s) to a payload
+        # buffer sized for axis-aligned rasterization, with movement direction
+        # aligned to +y in output and ball centered in top of payload buffer
         payload_dim_y = delta_w + 1 + 3 * int(BALL_RADIUS_FLOOR)
-        payload_buffer.set_dimensions(int(BALL_DIAMETER), payload_dim_y)
-        # Set rasterizer transform to align movement direction to +y in output
-        # and center ball in top of payload buffer
-        rasterizer_collision.set_scale_f10(1024)
-        rasterizer_collision.set_angle_wd(wd_init(90 - v_angle_wd))
-        rasterizer_collision.set_translate_map_world_to_screen_f10(
+        rasterizer_collision.prepare_and_rasterize_payload(
+            payload_buffer, int(BALL_DIAMETER), payload_dim_y, 90 - v_angle_wd,
             xw_f10, yw_f10, int(BALL_RADIUS_FLOOR) << 10,
-            int(BALL_RADIUS_FLOOR) << 10)
-        # Rasterize collision data for ball's current layer(s)
-        rasterizer_collision.rasterize_payload(payload_buffer, mask_layer)
+            int(BALL_RADIUS_FLOOR) << 10, mask_layer)
 
-        # Track how much of the timestep is spent in contact with different
-        # surfaces (for friction/slopes), splitting up the ball's time into
-        # delta_w + 1 buckets corresponding to the starting footprint and then
-        # each additional row it reaches over delta_ms
-        count_grass = int(0)
-        count_sand = int(0)
-        count_water = int(0)
-        touch_grass = bool(False)
-        touch_sand = bool(False)
-        count_water_row = int(0)
-        signed_count_slope_x = int(0)
-        signed_count_slope_y = int(0)
-        signed_incr_slope_x = int(0)
-        signed_incr_slope_y = int(0)
         # Check entire current ball footprint for up to two edges that current
         # velocity would collide with (plus at most one it wouldn't collide
         # with), then advance through towards ball's footprint after delta_ms
         # until first edge the current velocity would collide with, then up to
         # BALL_RADIUS_FLOOR more rows to look for an additional such edge if
-        # one is found
+        # one is found. Regions are handled in a second pass once the rows the
+        # ball reaches are known.
         m_i_chunk_scan_noncollide = int(-1)
         m_i_chunk_scan_collide0 = int(-1)
         m_i_chunk_scan_collide1 = int(-1)
         i_row = int(0)
-        i_payload_row_start = int(0)
+        i_payload_row_next = int(BALL_DIAMETER)  # first cell of next row
         i_row_end_scan = int(BALL_DIAMETER) + delta_w  # past last to scan
         w_to_step = int(delta_w)  # or less if collision is found
         w_to_step_f10 = delta_w_f10
+        # An edge usually covers several consecutive rows, and the velocity
+        # angle rarely changes between timesteps, so reuse earlier collision
+        # tests of an edge at this angle
+        edge_hit_memo = ptr16(self.arr_edge_hit_memo)
+        # Walk the scanned rows as one run of cells, skipping four at a time
+        # where an aligned word holds no edges (no wall chunk index has both
+        # non-wall bits set)
+        pb32 = ptr32(payload_buffer.buffer)
+        mask_non_wall4 = int(MGS_PAYLOAD_BITS_NON_WALL) * 0x01010101
+        i_payload = int(0)
+        i_payload_end = i_row_end_scan * int(BALL_DIAMETER)
+        while i_payload < i_payload_end:
+            if not (i_payload & 0x3) and \
+               (pb32[i_payload >> 2] & mask_non_wall4) == mask_non_wall4:
+                i_payload += 4
+                continue
+            maybe_i_chunk = pb[i_payload]
+            if maybe_i_chunk >= int(MGS_PAYLOAD_BITS_NON_WALL):
+                i_payload += 1
+                continue  # not an edge
+            # Find edge's row
+            while i_payload >= i_payload_row_next:
+                i_row += 1
+                i_payload_row_next += int(BALL_DIAMETER)
+            # Determine if edge is collision
+            memo = edge_hit_memo[maybe_i_chunk]
+            if (memo >> 1) == v_angle_wd:
+                hit = memo & 1
+            else:
+                # (pass the array object: asm_thumb gets its buffer address
+                # without boxing a pointer-sized int)
+                hit = int(velocity_hits_edge_wd(
+                    v_angle_wd, arr_chunk_normal_wd, maybe_i_chunk))
+                edge_hit_memo[maybe_i_chunk] = (v_angle_wd << 1) | hit
+            if hit:
+                # Edge is collision. Proceed by cases of what we've seen.
+                if m_i_chunk_scan_collide0 < 0:
+                    # First observed collision. Remember it and set w step,
+                    # scan end
+                    m_i_chunk_scan_collide0 = maybe_i_chunk
+                    if i_row <= int(BALL_DIAMETER):
+                        # Edge was in or one past ball starting footprint.
+                        # Don't advance ball, but check up to rad_floor rows
+                        # past ball footprint for edges to consider in
+                        # collision response.
+                        w_to_step = 0
+                        w_to_step_f10 = 0
+                        i_row_end_scan = \
+                            int(BALL_DIAMETER) + int(BALL_RADIUS_FLOOR)
+                    else:
+                        # Ball made it past starting footprint without
+                        # collision. Advance ball to last non-collision
+                        # footprint, and check rad_floor rows past current
+                        # for edges.
+                        w_to_step = i_row - int(BALL_DIAMETER)
+                        w_to_step_f10 = w_to_step << 10
+                        i_row_end_scan = i_row + int(BALL_RADIUS_FLOOR) + 1
+                    i_payload_end = i_row_end_scan * int(BALL_DIAMETER)
+                elif maybe_i_chunk != m_i_chunk_scan_collide0 and \
+                     m_i_chunk_scan_collide1 < 0:
+                    # Second unique observed collision. Remember it.
+                    m_i_chunk_scan_collide1 = maybe_i_chunk
+            else:
+                # Remember non-collision contacted edge if didn't have one
+                if m_i_chunk_scan_noncollide < 0:
+                    m_i_chunk_scan_noncollide = maybe_i_chunk
+            i_payload += 1
+
+        # Track how much of the timestep is spent in contact with different
+        # surfaces (for friction/slopes), splitting up the ball's time into
+        # delta_w + 1 buckets corresponding to the starting footprint and then
+        # each additional row it reaches over delta_ms
         # TODO: count water contact and handle water somehow
-        while i_row < i_row_end_scan:
-            # Check current row
-            for i_off in range(int(BALL_DIAMETER)):
-                maybe_i_chunk = pb[i_payload_row_start + i_off]
-                if maybe_i_chunk & int(MGS_PAYLOAD_BIT_NON_WALL):
-                    # Track contact with relevant regions
-                    region = maybe_i_chunk & int(MGS_PAYLOAD_MASK_LOW)
-                    if region == int(MGS_REGION_FAIRWAY):
-                        touch_grass = bool(True)
-                    elif region == int(MGS_REGION_WATER):
-                        count_water_row += 1
-                    elif region == int(MGS_REGION_SANDTRAP):
-                        touch_sand = bool(True)
-                    elif region == int(MGS_REGION_SLOPE_UP):
-                        signed_incr_slope_y = int(-1)
-                        touch_grass = bool(True)
-                    elif region == int(MGS_REGION_SLOPE_DOWN):
-                        signed_incr_slope_y = int(1)
-                        touch_grass = bool(True)
-                    elif region == int(MGS_REGION_SLOPE_LEFT):
-                        signed_incr_slope_x = int(-1)
-                        touch_grass = bool(True)
-                    elif region == int(MGS_REGION_SLOPE_RIGHT):
-                        signed_incr_slope_x = int(1)
-                        touch_grass = bool(True)
-                    # Update mask_layer if this is a trigger (last wins)
-                    mask_trigger = \
-                        maybe_i_chunk >> int(MGS_PAYLOAD_SHIFT_MASK_TRIGGER)
-                    if mask_trigger:
-                        mask_layer = mask_trigger
-                    continue  # Done processing non-edge
-                # Determine if edge is collision
-                normal_wd = arr_chunk_normal_wd[maybe_i_chunk]
-                if velocity_hits_normal_wd(v_angle_wd, normal_wd):
-                    # Edge is collision. Proceed by cases of what we've seen.
-                    if m_i_chunk_scan_collide0 < 0:
-                        # First observed collision. Remember it and set w step,
-                        # scan end
-                        m_i_chunk_scan_collide0 = maybe_i_chunk
-                        if i_row <= int(BALL_DIAMETER):
-                            # Edge was in or one past ball starting footprint.
-                            # Don't advance ball, but check up to rad_floor rows
-                            # past ball footprint for edges to consider in
-                            # collision response.
-                            w_to_step = 0
-                            w_to_step_f10 = 0
-                            i_row_end_scan = \
-                                int(BALL_DIAMETER) + int(BALL_RADIUS_FLOOR)
-                        else:
-                            # Ball made it past starting footprint without
-                            # collision. Advance ball to last non-collision
-                            # footprint, and check rad_floor rows past current
-                            # for edges.
-                            w_to_step = i_row - int(BALL_DIAMETER)
-                            w_to_step_f10 = w_to_step << 10
-                            i_row_end_scan = i_row + int(BALL_RADIUS_FLOOR) + 1
-                    elif maybe_i_chunk != m_i_chunk_scan_collide0 and \
-                         m_i_chunk_scan_collide1 < 0:
-                        # Second unique observed collision. Remember it.
-                        m_i_chunk_scan_collide1 = maybe_i_chunk
-                else:
-                    # Remember non-collision contacted edge if didn't have one
-                    if m_i_chunk_scan_noncollide < 0:
-                        m_i_chunk_scan_noncollide = maybe_i_chunk
-            # Update region contact counts, treating entire starting footprint
-            # as one bucket and then individual successive rows
-            if i_row >= int(BALL_DIAMETER) - 1 and \
-               (i_row - int(BALL_DIAMETER)) < w_to_step:
-                # Ball's ending footprint will include or be past this row.
-                # Update region counts
-                if touch_grass:
-                    count_grass += 1
-                    touch_grass = bool(False)
-                if touch_sand:
-                    count_sand += 1
-                    touch_sand = bool(False)
-                if count_water_row > int(BALL_RADIUS_FLOOR):
-                    count_water += 1
-                count_water_row = 0
-                signed_count_slope_x += signed_incr_slope_x
-                signed_count_slope_y += signed_incr_slope_y
-                signed_incr_slope_x = int(0)
-                signed_incr_slope_y = int(0)
-            # Advance to next row
-            i_row += 1
-            i_payload_row_start += int(BALL_DIAMETER)
+        scan_payload_regions(payload_buffer.buffer, payload_buffer.buffer_high,
+                             i_row_end_scan, int(BALL_DIAMETER) + w_to_step,
+                             mask_layer, arr_scan_regions)
+        arr_scan = ptr32(arr_scan_regions)
+        count_grass = arr_scan[int(I_SCAN_COUNT_GRASS)]
+        count_sand = arr_scan[int(I_SCAN_COUNT_SAND)]
+        count_water = arr_scan[int(I_SCAN_COUNT_WATER)]
+        signed_count_slope_x = arr_scan[int(I_SCAN_SIGNED_COUNT_SLOPE_X)]
+        signed_count_slope_y = arr_scan[int(I_SCAN_SIGNED_COUNT_SLOPE_Y)]
+        mask_layer = arr_scan[int(I_SCAN_MASK_LAYER)]
 
         # Select up to two edges to say the ball collided with, favoring edges
         # opposing the current velocity
@@ -1094,33 +1613,43 @@ class BallState:
             maybe_i_chunk_contact1 = m_i_chunk_scan_noncollide
         # Advance ball's position to delta_ms or first collision and indicate
         # the edges collided with, if any
-        self._set_maybe_i_chunk_contact(maybe_i_chunk_contact0,
-                                        maybe_i_chunk_contact1)
+        arr_state[int(I_BALL_MAYBE_I_CHUNK_CONTACT0)] = maybe_i_chunk_contact0
+        arr_state[int(I_BALL_MAYBE_I_CHUNK_CONTACT1)] = maybe_i_chunk_contact1
+        # Note whether this step left the ball exactly as it found it
+        at_rest = int(0)
+        if v_w_per_ms_f20 == 0 and maybe_i_chunk_contact0 < 0 and \
+           maybe_i_chunk_contact1 < 0 and count_water == 0 and \
+           signed_count_slope_x == 0 and signed_count_slope_y == 0 and \
+           mask_layer == arr_state[int(I_BALL_MASK_LAYER)]:
+            at_rest = 1
+        arr_state[int(I_BALL_AT_REST)] = at_rest
         if w_to_step_f10 > 0:
-            xw_f10 += \
-                (int(cos_wd_f10(v_angle_wd)) * w_to_step_f10 + 0x200) >> 10
-            yw_f10 += \
-                (int(sin_wd_f10(v_angle_wd)) * w_to_step_f10 + 0x200) >> 10
-            self._set_location_f10(xw_f10, yw_f10)
+            xw_f10 += (vx_unit_f10 * w_to_step_f10 + 0x200) >> 10
+            yw_f10 += (vy_unit_f10 * w_to_step_f10 + 0x200) >> 10
+            arr_state[int(I_BALL_XW_F10)] = xw_f10
+            arr_state[int(I_BALL_YW_F10)] = yw_f10
         # Translate per-region counts into approximate number of ms in contact
         # with each region, and update velocity per friction
         denom = delta_w + 1
-        ms_grass = (delta_ms * count_grass) // denom
-        ms_sand = (delta_ms * count_sand) // denom
+        # Divide once; the rounded-up f16 reciprocal then gives exact quotients
+        # for non-negative counts, since denom is bounded by payload size
+        recip_denom_f16 = ((delta_ms << 16) + denom - 1) // denom
+        ms_grass = (count_grass * recip_denom_f16) >> 16
+        ms_sand = (count_sand * recip_denom_f16) >> 16
         v_w_per_ms_f20 -= int(BALL_COEFF_GRASS_F20) * ms_grass
         v_w_per_ms_f20 -= int(BALL_COEFF_SAND_F20) * ms_sand
         if v_w_per_ms_f20 < 0:
             v_w_per_ms_f20 = int(0)
-        self._set_velocity_wd_f20(v_angle_wd, v_w_per_ms_f20)
-        # After friction, apply effect of any slope contact to velocity
-        self.set_mask_layer(mask_layer)
-        if signed_count_slope_x != 0 or signed_count_slope_y != 0:
+        arr_state[int(I_BALL_MASK_LAYER)] = mask_layer
+        # After friction, apply effect of any slope contact to velocity. Either
+        # way, the new velocity is stored exactly once.
+        if signed_count_slope_x == 0 and signed_count_slope_y == 0:
+            arr_state[int(I_BALL_V_W_PER_MS_F20)] = v_w_per_ms_f20
+        else:
             # Convert angle and updated velocity to vector
             w_per_ms_f10 = (v_w_per_ms_f20 + 0x200) >> 10
-            xw_per_ms_f10 = \
-                (int(cos_wd_f10(v_angle_wd)) * w_per_ms_f10 + 0x200) >> 10
-            yw_per_ms_f10 = \
-                (int(sin_wd_f10(v_angle_wd)) * w_per_ms_f10 + 0x200) >> 10
+            xw_per_ms_f10 = (vx_unit_f10 * w_per_ms_f10 + 0x200) >> 10
+            yw_per_ms_f10 = (vy_unit_f10 * w_per_ms_f10 + 0x200) >> 10
             # Add effect of slopes to vector
             signed_ms_slope_x = (delta_ms * signed_count_slope_x) // denom
             signed_ms_slope_y = (delta_ms * signed_count_slope_y) // denom
@@ -1136,20 +1665,21 @@ class BallState:
         # but meh. Helper handles in_water, is_stopped.
         if count_water == denom:
             # Ball was in water for entire frame -- add to existing ms
-            self._set_water_status(int(self.water_ms) + delta_ms)
+            self._set_water_status(arr_state[int(I_BALL_WATER_MS)] + delta_ms)
         else:
             # Ball was in water for part of frame -- reset tracking
-            water_ms = (delta_ms * count_water) // denom
+            water_ms = (count_water * recip_denom_f16) >> 16
             self._set_water_status(water_ms)
 
     @micropython.viper
     def _maybe_resolve_collision(self, arr_chunk_normal_wd:ptr16):
+        arr_state = ptr32(self.arr_state)
         # Find which of the up to two specified contact edges count as
         # collisions given the current ball velocity angle
-        v_angle_wd = int(self.v_angle_wd)
-        v_w_per_ms_f20 = int(self.v_w_per_ms_f20)
-        maybe_i_chunk_contact0 = int(self.maybe_i_chunk_contact0)
-        maybe_i_chunk_contact1 = int(self.maybe_i_chunk_contact1)
+        v_angle_wd = arr_state[int(I_BALL_V_ANGLE_WD)]
+        v_w_per_ms_f20 = arr_state[int(I_BALL_V_W_PER_MS_F20)]
+        maybe_i_chunk_contact0 = arr_state[int(I_BALL_MAYBE_I_CHUNK_CONTACT0)]
+        maybe_i_chunk_contact1 = arr_state[int(I_BALL_MAYBE_I_CHUNK_CONTACT1)]
         normal0_wd = int(0)
         normal1_wd = int(0)
         is_collision0 = bool(False)
@@ -1172,54 +1702,81 @@ class BallState:
             # Reflect about endpoint normal of the two edges
             v_angle_wd = int(reflect_velocity_about_normal_wd(
                 v_angle_wd, get_endpoint_normal_wd(normal0_wd, normal1_wd)))
-            self._set_velocity_wd_f20(v_angle_wd, v_w_per_ms_f20)
+            arr_state[int(I_BALL_V_ANGLE_WD)] = v_angle_wd
+            arr_state[int(I_BALL_V_W_PER_MS_F20)] = v_w_per_ms_f20
         elif is_collision0:
             # Reflect about 0's normal
             v_angle_wd = int(reflect_velocity_about_normal_wd(
                 v_angle_wd, normal0_wd))
-            self._set_velocity_wd_f20(v_angle_wd, v_w_per_ms_f20)
+            arr_state[int(I_BALL_V_ANGLE_WD)] = v_angle_wd
+            arr_state[int(I_BALL_V_W_PER_MS_F20)] = v_w_per_ms_f20
         elif is_collision1:
             # Reflect about 1's normal
             v_angle_wd = int(reflect_velocity_about_normal_wd(
                 v_angle_wd, normal1_wd))
-            self._set_velocity_wd_f20(v_angle_wd, v_w_per_ms_f20)
+            arr_state[int(I_BALL_V_ANGLE_WD)] = v_angle_wd
+            arr_state[int(I_BALL_V_W_PER_MS_F20)] = v_w_per_ms_f20
         # Else, nothing to do
 
     @micropython.native
     def _update_stopped_tracking(self, delta_ms):
-        xw_f10 = self.xw_f10
-        yw_f10 = self.yw_f10
-        xw_exp_avg_f10 = self.xw_exp_avg_f10
-        yw_exp_avg_f10 = self.yw_exp_avg_f10
-        ms_below_stop_threshold = self.ms_below_stop_threshold
+        arr_state = self.arr_state
+        # While moving fast, only do the work below every fourth timestep
+        delta_ms += arr_state[I_BALL_STOPPED_MS_PENDING]
+        if arr_state[I_BALL_V_W_PER_MS_F20] >= BALL_STOPPED_COARSE_F20:
+            ticks = arr_state[I_BALL_STOPPED_TICKS] + 1
+            arr_state[I_BALL_STOPPED_TICKS] = ticks
+            if ticks & 0x3:
+                arr_state[I_BALL_STOPPED_MS_PENDING] = delta_ms
+                return
+        xw_f10 = arr_state[I_BALL_XW_F10]
+        yw_f10 = arr_state[I_BALL_YW_F10]
+        # Sample position for the exp avg; over several timesteps, use the
+        # midpoint of the path since the last update as its stand-in
+        xw_sample_f10 = xw_f10
+        yw_sample_f10 = yw_f10
+        if arr_state[I_BALL_STOPPED_MS_PENDING]:
+            arr_state[I_BALL_STOPPED_MS_PENDING] = 0
+            xw_sample_f10 = \
+                (xw_f10 + arr_state[I_BALL_XW_STOPPED_LAST_F10]) >> 1
+            yw_sample_f10 = \
+                (yw_f10 + arr_state[I_BALL_YW_STOPPED_LAST_F10]) >> 1
+        arr_state[I_BALL_XW_STOPPED_LAST_F10] = xw_f10
+        arr_state[I_BALL_YW_STOPPED_LAST_F10] = yw_f10
+        xw_exp_avg_f10 = arr_state[I_BALL_XW_EXP_AVG_F10]
+        yw_exp_avg_f10 = arr_state[I_BALL_YW_EXP_AVG_F10]
+        ms_below_stop_threshold = arr_state[I_BALL_MS_BELOW_STOP_THRESHOLD]
         # Update exp avg of ball position, weighted by timestep duration
         # exp_avg = a * x + (1.0 - a) * exp_avg
         # a = ms_per_frame / 1000
-        a_f10 = int(BALL_COEFF_A) * delta_ms
-        xw_exp_avg_f10 = \
-            (a_f10 * xw_f10 + (1024 - a_f10) * xw_exp_avg_f10 + 0x200) >> 10
-        yw_exp_avg_f10 = \
-            (a_f10 * yw_f10 + (1024 - a_f10) * yw_exp_avg_f10 + 0x200) >> 10
+        a_f10 = BALL_COEFF_A * delta_ms
+        if a_f10 > 1024:
+            a_f10 = 1024  # accumulated ms can exceed a full weight
+        one_minus_a_f10 = 1024 - a_f10
+        xw_exp_avg_f10 = (a_f10 * xw_sample_f10 +
+                          one_minus_a_f10 * xw_exp_avg_f10 + 0x200) >> 10
+        yw_exp_avg_f10 = (a_f10 * yw_sample_f10 +
+                          one_minus_a_f10 * yw_exp_avg_f10 + 0x200) >> 10
         # Test if avg is far from ball position
         abs_diff_xw_f10 = xw_f10 - xw_exp_avg_f10
-        if abs_diff_xw_f10 < 0:
-            abs_diff_xw_f10 = -abs_diff_xw_f10
+        sign = abs_diff_xw_f10 >> 31
+        abs_diff_xw_f10 = (abs_diff_xw_f10 ^ sign) - sign
         abs_diff_yw_f10 = yw_f10 - yw_exp_avg_f10
-        if abs_diff_yw_f10 < 0:
-            abs_diff_yw_f10 = -abs_diff_yw_f10
-        if abs_diff_xw_f10 < int(BALL_DELTA_W_STOPPED_F10) and \
-           abs_diff_yw_f10 < int(BALL_DELTA_W_STOPPED_F10):
+        sign = abs_diff_yw_f10 >> 31
+        abs_diff_yw_f10 = (abs_diff_yw_f10 ^ sign) - sign
+        if abs_diff_xw_f10 < BALL_DELTA_W_STOPPED_F10 and \
+           abs_diff_yw_f10 < BALL_DELTA_W_STOPPED_F10:
             # Ball is near avg. Increment ms and mark stopped after long enough.
             ms_below_stop_threshold += delta_ms
-            if ms_below_stop_threshold > int(BALL_MS_BEFORE_STOPPED):
-                self.is_stopped = True
+            if ms_below_stop_threshold > BALL_MS_BEFORE_STOPPED:
+                arr_state[I_BALL_IS_STOPPED] = 1
         else:
             # Reset time since near avg
             ms_below_stop_threshold = 0
         # Flush out updates
-        self.xw_exp_avg_f10 = xw_exp_avg_f10
-        self.yw_exp_avg_f10 = yw_exp_avg_f10
-        self.ms_below_stop_threshold = ms_below_stop_threshold
+        arr_state[I_BALL_XW_EXP_AVG_F10] = xw_exp_avg_f10
+        arr_state[I_BALL_YW_EXP_AVG_F10] = yw_exp_avg_f10
+        arr_state[I_BALL_MS_BELOW_STOP_THRESHOLD] = ms_below_stop_threshold
 
     # Advances the ball by a timestep of delta_ms per the level geometry.
     # Resolves up to one collision, leaving the ball in the state it should have
@@ -1227,14 +1784,27 @@ class BallState:
     @micropython.native
     def advance(self, delta_ms, rasterizer_collision, payload_buffer,
                 arr_chunk_normal_wd):
+        arr_state = self.arr_state
         # Do nothing if stopped
-        if self.is_stopped:
+        if arr_state[I_BALL_IS_STOPPED]:
             return
-        # Try handling timestep as hole interaction if close to it
-        handled_by_hole = self._maybe_advance_to_hole_interaction(delta_ms)
-        if not handled_by_hole:
-            # No hole interaction. Handle timestep according to rasterized
-            # scene and resolve any resulting collision
+        # Try handling timestep as hole interaction if close to it. Skip that
+        # check outright if the ball was far enough away that it still can't
+        # reach the hole this timestep.
+        clearance_f10 = arr_state[I_BALL_HOLE_CLEARANCE_F10]
+        w_range_f10 = \
+            (arr_state[I_BALL_V_W_PER_MS_F20] * delta_ms + 0x200) >> 10
+        if clearance_f10 > w_range_f10:
+            arr_state[I_BALL_HOLE_CLEARANCE_F10] = clearance_f10 - w_range_f10
+            handled_by_hole = False
+        else:
+            handled_by_hole = self._maybe_advance_to_hole_interaction(delta_ms)
+        if not handled_by_hole and not (
+                arr_state[I_BALL_AT_REST] and
+                arr_state[I_BALL_V_W_PER_MS_F20] == 0):
+            # No hole interaction, and ball isn't resting where the last step
+            # left it. Handle timestep according to rasterized scene and
+            # resolve any resulting collision
             self._advance_to_collision_axis_aligned(
                 delta_ms, rasterizer_collision, payload_buffer,
                 arr_chunk_normal_wd)
@@ -1246,43 +1816,46 @@ class BallState:
     @micropython.native
     def draw_ball(self, display, transformed_rasterizer, color,
                   debug_offset_x=0, debug_offset_y=0):
+        arr_state = self.arr_state
         xs_f10, ys_f10 = transformed_rasterizer.world_to_screen_f10(
-            self.xw_f10, self.yw_f10)
+            arr_state[I_BALL_XW_F10], arr_state[I_BALL_YW_F10])
         color_line = 1
-        color_fill = 0 if not utils.use_gray and self.on_sand else 1
+        color_fill = \
+            0 if not utils.use_gray and arr_state[I_BALL_ON_SAND] else 1
         draw_circle_line_fill(display, xs_f10, ys_f10,
-                              transformed_rasterizer.scale_f10 * BALL_DIAMETER,
+                              transformed_rasterizer.ball_diameter_f10,
                               color_line, color_fill)
 
     @micropython.native
     def draw_hole(self, display, transformed_rasterizer, color,
                   debug_offset_x=0, debug_offset_y=0):
+        arr_state = self.arr_state
         xs_f10, ys_f10 = transformed_rasterizer.world_to_screen_f10(
-            self.xw_hole_f10, self.yw_hole_f10)
+            arr_state[I_BALL_XW_HOLE_F10], arr_state[I_BALL_YW_HOLE_F10])
         color_line = 0 if utils.use_gray else 1
         color_fill = 0
-        draw_circle_line_fill(
-            display, xs_f10, ys_f10,
-            transformed_rasterizer.scale_f10 * BALL_HOLE_DIAMETER, color_line,
-            color_fill)
+        draw_circle_line_fill(display, xs_f10, ys_f10,
+                              transformed_rasterizer.hole_diameter_f10,
+                              color_line, color_fill)
 
     # Draws a line from the ball's location to its location delta_ms in the
     # future per velocity using the *transform* of the rasterizer
     @micropython.native
     def draw_velocity(self, display, delta_ms, transformed_rasterizer, color,
                       debug_offset_x=0, debug_offset_y=0):
-        xw_f10 = self.xw_f10
-        yw_f10 = self.yw_f10
-        xs_f10, ys_f10 = transformed_rasterizer.world_to_screen_f10(
+        arr_state = self.arr_state
+        xw_f10 = arr_state[I_BALL_XW_F10]
+        yw_f10 = arr_state[I_BALL_YW_F10]
+        xs_b, ys_b = transformed_rasterizer._world_to_screen_int(
             xw_f10, yw_f10)
-        xs_b = ((xs_f10 + 0x200) >> 10) + debug_offset_x
-        ys_b = ((ys_f10 + 0x200) >> 10) + debug_offset_y
+        xs_b += debug_offset_x
+        ys_b += debug_offset_y
 
         xw_f10, yw_f10 = self.location_after_delta_ms_f10(delta_ms)
-        xs_f10, ys_f10 = transformed_rasterizer.world_to_screen_f10(
+        xs_e, ys_e = transformed_rasterizer._world_to_screen_int(
             xw_f10, yw_f10)
-        xs_e = ((xs_f10 + 0x200) >> 10) + debug_offset_x
-        ys_e = ((ys_f10 + 0x200) >> 10) + debug_offset_y
+        xs_e += debug_offset_x
+        ys_e += debug_offset_y
 
         display.drawLine(xs_b, ys_b, xs_e, ys_e, color)
 
@@ -1291,9 +1864,11 @@ class BallState:
     @micropython.native
     def draw_exp_avg(self, display, transformed_rasterizer, debug_offset_x=0,
                      debug_offset_y=0):
-        xs_f10, ys_f10 = transformed_rasterizer.world_to_screen_f10(
-            self.xw_exp_avg_f10, self.yw_exp_avg_f10)
-        xs = ((xs_f10 + 0x200) >> 10) + debug_offset_x
-        ys = ((ys_f10 + 0x200) >> 10) + debug_offset_y
+        arr_state = self.arr_state
+        xs, ys = transformed_rasterizer._world_to_screen_int(
+            arr_state[I_BALL_XW_EXP_AVG_F10],
+            arr_state[I_BALL_YW_EXP_AVG_F10])
+        xs += debug_offset_x
+        ys += debug_offset_y
         display.drawRectangle(xs - 1, ys - 1, 3, 3, 1)
         display.setPixel(xs, ys, 0)
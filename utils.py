@@ -17,7 +17,7 @@
 
 from array import array
 from time import ticks_ms
-from os import remove
+from os import remove, stat
 
 # Status bools and other vars. Set soon after import then left unchanged.
 game_name = None
@@ -34,79 +34,159 @@ except ImportError:
 
 # Profiling
 
+# Set True to record and display frame timestamps. False compiles the per-frame
+# recording hooks down to nothing and skips allocating their state.
+PROFILE = const(False)
+
 MAX_TIMESTAMP_MS = const(8)
 MAX_TIMESTAMP_RESETS_SINCE_UPDATE = const(5)  # 1 to always update
-arr_timestamp_ms = array('l', [0] * MAX_TIMESTAMP_MS)
-num_timestamp_ms = 0
-num_timestamp_resets_since_update = MAX_TIMESTAMP_RESETS_SINCE_UPDATE - 1
-
-@micropython.native
+# Counters indexed by I_TS_*, in an array rather than globals so Viper code can
+# read and write it
+I_TS_NUM_MS = const(0)
+I_TS_RESETS_SINCE_UPDATE = const(1)
+I_TS_LAST_MS = const(2)
+# Strings for small deltas, made on first display so they aren't reallocated
+# every frame (and not at all if timestamps are never displayed)
+MAX_TIMESTAMP_STR_CACHED = const(128)
+strs_delta_ms = None
+# Zeros for blanking a display row by slice assignment, sized to the display
+# on first use
+bytes_zero_row = None
+if PROFILE:
+    # ms since the previous timestamp, as of each timestamp (the first one's is
+    # relative to the previous frame's last, so it isn't displayed)
+    arr_timestamp_delta_ms = array('h', [0] * MAX_TIMESTAMP_MS)
+    arr_timestamp_state = \
+        array('l', [0, MAX_TIMESTAMP_RESETS_SINCE_UPDATE - 1, 0])
+else:
+    arr_timestamp_delta_ms = None
+    arr_timestamp_state = None
+
+@micropython.viper
 def timestamp_add():
-    global num_timestamp_ms
-    global num_timestamp_resets_since_update
-    ts = ticks_ms()
-    if num_timestamp_resets_since_update == 0 and \
-       num_timestamp_ms < MAX_TIMESTAMP_MS:
-        arr_timestamp_ms[num_timestamp_ms] = ts
-        num_timestamp_ms += 1
-
-@micropython.native
+    if PROFILE:
+        state = ptr32(arr_timestamp_state)
+        num_ms = state[int(I_TS_NUM_MS)]
+        if state[int(I_TS_RESETS_SINCE_UPDATE)] == 0 and \
+           num_ms < int(MAX_TIMESTAMP_MS):
+            ts = int(ticks_ms())
+            ptr16(arr_timestamp_delta_ms)[num_ms] = \
+                ts - state[int(I_TS_LAST_MS)]
+            state[int(I_TS_LAST_MS)] = ts
+            state[int(I_TS_NUM_MS)] = num_ms + 1
+
+@micropython.viper
 def timestamp_reset():
-    global num_timestamp_ms
-    global num_timestamp_resets_since_update
-    num_timestamp_resets_since_update += 1
-    if num_timestamp_resets_since_update >= \
-       int(MAX_TIMESTAMP_RESETS_SINCE_UPDATE):
-        # Actually reset and record new timestamps
-        num_timestamp_resets_since_update = 0
-        num_timestamp_ms = 0
+    if PROFILE:
+        state = ptr32(arr_timestamp_state)
+        num_resets = state[int(I_TS_RESETS_SINCE_UPDATE)] + 1
+        if num_resets >= int(MAX_TIMESTAMP_RESETS_SINCE_UPDATE):
+            # Actually reset and record new timestamps
+            num_resets = 0
+            state[int(I_TS_NUM_MS)] = 0
+        state[int(I_TS_RESETS_SINCE_UPDATE)] = num_resets
 
 def timestamp_display(display):
+    global strs_delta_ms
+    global bytes_zero_row
+    if not PROFILE:
+        return
+    if strs_delta_ms is None:
+        strs_delta_ms = [None] * MAX_TIMESTAMP_STR_CACHED
     # Blank out bottom of screen
+    width = display.width
+    if bytes_zero_row is None or len(bytes_zero_row) != width:
+        bytes_zero_row = bytes(width)
     height_bytes = display.height >> 3
-    i_start = (height_bytes - 1) * display.width
-    buf0 = display.display.buffer
-    buf1 = display.display.shading
-    for i in range(i_start, i_start + display.width):
-        buf0[i] = 0
-        buf1[i] = 0
+    i_start = (height_bytes - 1) * width
+    i_end = i_start + width
+    # (Buffer and shading planes are separate allocations, so one write each)
+    zero_row = bytes_zero_row
+    display.display.buffer[i_start:i_end] = zero_row
+    display.display.shading[i_start:i_end] = zero_row
     y = 32
     x = 1
     # display.drawText(f"{free_min}", x, y, 1)
-    for i in range(1, num_timestamp_ms):
-        delta_ms = arr_timestamp_ms[i] - arr_timestamp_ms[i - 1]
-        display.drawText(f"{delta_ms}", x, y, 1)
+    draw_text = display.drawText
+    arr_delta_ms = arr_timestamp_delta_ms
+    strs = strs_delta_ms
+    for i in range(1, arr_timestamp_state[I_TS_NUM_MS]):
+        delta_ms = arr_delta_ms[i]
+        if 0 <= delta_ms < MAX_TIMESTAMP_STR_CACHED:
+            str_delta_ms = strs[delta_ms]
+            if str_delta_ms is None:
+                str_delta_ms = str(delta_ms)
+                strs[delta_ms] = str_delta_ms
+        else:
+            str_delta_ms = str(delta_ms)
+        draw_text(str_delta_ms, x, y, 1)
         x += 13
 
 # Save / load machinery
 
 # bytes: version #, use_gray, i_level, arr_level_strokes (9)
-bytes_save_default = \
-    bytearray(b'\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
-    # bytearray(b'\x01\x01\x08\x01\x02\x01\x02\x02\x02\x02\x00\x00')
+bytes_save_default = b'\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+# bytes_save_default = b'\x01\x01\x08\x01\x02\x01\x02\x02\x02\x02\x00\x00'
+I_SAVE_VERSION = const(0)
+I_SAVE_USE_GRAY = const(1)
+I_SAVE_I_LEVEL = const(2)
+I_SAVE_LEVEL_STROKES = const(3)
+
+# Built on first use, since game_name is set after import
+save_name = None
 
 def get_save_name():
-    return "/Saves/" + game_name + ".bin"
+    global save_name
+    if save_name is None:
+        save_name = "/Saves/" + game_name + ".bin"
+    return save_name
+
+# Save file, opened by the first write and kept open for the session so later
+# writes skip the path lookup and directory update of reopening
+f_obj_save = None
+
+def close_save_file():
+    global f_obj_save
+    if f_obj_save is not None:
+        try:
+            f_obj_save.close()
+        except:
+            pass
+        f_obj_save = None
 
 def delete_save():
+    close_save_file()
     try:
         remove(get_save_name())
     except:
         pass
 
 def write_save_bytes(bytes_save):
+    # MicroPython's os has no fd-level open()/write(), and its binary file
+    # objects are unbuffered, so a file object is already the thinnest path
+    global f_obj_save
     try:
-        with open(get_save_name(), "wb") as f_obj:
-            f_obj.write(bytes_save)
+        if f_obj_save is None:
+            # Truncates any old file; every write is the full save
+            f_obj_save = open(get_save_name(), "wb")
+        else:
+            f_obj_save.seek(0)
+        f_obj_save.write(bytes_save)
+        f_obj_save.flush()  # commit to flash, since the file stays open
+        return True
     except:
-        pass
+        close_save_file()  # reopen on next write
+        return False
 
 def read_save_bytes(bytes_save):
     try:
-        with open(get_save_name(), "rb") as f_obj:
-            bytes_save[0] = 0
+        save_name = get_save_name()
+        if stat(save_name)[6] != len(bytes_save_default):
+            raise ValueError  # truncated or other-format save -- ignore
+        with open(save_name, "rb") as f_obj:
             f_obj.readinto(bytes_save)
-            if bytes_save[0] != bytes_save_default[0]:
+            if bytes_save[I_SAVE_VERSION] != \
+               bytes_save_default[I_SAVE_VERSION]:
                 raise ValueError  # old save format -- ignore
             return True
     except:
@@ -117,20 +197,48 @@ def read_save_bytes(bytes_save):
 class SaveData:
     def __init__(self):
         # Do one-time load
-        global loaded_save
         global use_gray
         self._bytes_save = bytearray(len(bytes_save_default))
-        loaded_save = read_save_bytes(self._bytes_save)
-        # Initialize contents from load
-        self.load_as_gray = bool(self._bytes_save[1])
-        self.i_level = self._bytes_save[2]
-        self.arr_level_strokes = memoryview(self._bytes_save)[3:]
+        # File I/O goes through one view of the save bytes, made once
+        self._mv_save = memoryview(self._bytes_save)
+        # Contents of the save file as of the last read or write, to skip
+        # rewriting it unchanged (all zeros, an invalid save, if no file)
+        self._bytes_saved = bytearray(len(bytes_save_default))
+        # Read-only by convention, aliasing the save bytes -- prefer
+        # get_level_strokes() / set_level_strokes()
+        self.arr_level_strokes = self._mv_save[I_SAVE_LEVEL_STROKES:]
+        self.reload()
 
         use_gray = self.load_as_gray
 
+    # Re-reads the save file into the existing buffers (or the default save if
+    # there's no valid file), without allocating
+    def reload(self):
+        global loaded_save
+        loaded_save = read_save_bytes(self._mv_save)
+        if loaded_save:
+            self._bytes_saved[:] = self._bytes_save
+        else:
+            self._bytes_saved[I_SAVE_VERSION] = 0  # next save() must write
+        # Initialize contents from load
+        self.load_as_gray = bool(self._bytes_save[I_SAVE_USE_GRAY])
+        self.i_level = self._bytes_save[I_SAVE_I_LEVEL]
+
+    # Reads / writes strokes for level i_level directly in the save bytes
+    @micropython.viper
+    def get_level_strokes(self, i_level:int) -> int:
+        return ptr8(self._bytes_save)[int(I_SAVE_LEVEL_STROKES) + i_level]
+
+    @micropython.viper
+    def set_level_strokes(self, i_level:int, strokes:int):
+        ptr8(self._bytes_save)[int(I_SAVE_LEVEL_STROKES) + i_level] = strokes
+
     def save(self):
-        # Preserve save format number at [0]
-        self._bytes_save[1] = int(self.load_as_gray)
-        self._bytes_save[2] = self.i_level
-        # arr_level_strokes is memoryview at [3:]
-        write_save_bytes(self._bytes_save)
+        # Preserve save format number at [I_SAVE_VERSION]
+        self._bytes_save[I_SAVE_USE_GRAY] = int(self.load_as_gray)
+        self._bytes_save[I_SAVE_I_LEVEL] = self.i_level
+        # arr_level_strokes is memoryview at [I_SAVE_LEVEL_STROKES:]
+        if self._bytes_save == self._bytes_saved:
+            return  # flash already holds these bytes
+        if write_save_bytes(self._mv_save):
+            self._bytes_saved[:] = self._bytes_save